@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        from django.conf import settings
+
+        if settings.SLOW_QUERY_LOG:
+            from .slow_queries import enable
+            enable()
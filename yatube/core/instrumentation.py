@@ -0,0 +1,94 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.base import Template
+
+# Метрики текущего запроса; None, когда замер выключен
+current = ContextVar("request_metrics", default=None)
+
+_installed = False
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper соединения: время и число запросов."""
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+@contextmanager
+def measure():
+    """Метрики текущего запроса; вложенный вызов берёт уже начатые."""
+    metrics = current.get()
+    if metrics is not None:
+        yield metrics
+        return
+    metrics = RequestMetrics()
+    token = current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            yield metrics
+    finally:
+        current.reset(token)
+
+
+def record_cache(hit):
+    metrics = current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        metrics = current.get()
+        if metrics is None:
+            return render(self, context)
+        # include рендерит вложенные шаблоны тем же методом,
+        # поэтому время считаем только у внешнего
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+    return wrapper
+
+
+def install():
+    """Подключает замер рендеринга шаблонов; вызывается один раз,
+    только если замер включён."""
+    global _installed
+    if not _installed:
+        Template.render = _timed_render(Template.render)
+        _installed = True
@@ -0,0 +1,74 @@
+import glob
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slow_queries import query_shape
+
+
+class Command(BaseCommand):
+    help = "Сводка журнала медленных запросов по виду запроса"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=settings.SLOW_QUERY_LOG_FILE,
+            help="Журнал; ротированные копии .1, .2 … читаются тоже",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10,
+            help="Сколько самых дорогих видов запросов показать",
+        )
+
+    def read(self, path):
+        files = sorted(glob.glob(f"{glob.escape(path)}.*"), reverse=True)
+        files.append(path)
+        for name in files:
+            try:
+                with open(name, encoding="utf-8") as log:
+                    for line in log:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+            except FileNotFoundError:
+                continue
+
+    def handle(self, *args, file, limit, **options):
+        shapes = defaultdict(lambda: {
+            "count": 0, "total": 0.0, "max": 0.0,
+            "views": defaultdict(int), "record": None,
+        })
+        for record in self.read(file):
+            shape = shapes[query_shape(record["sql"])]
+            shape["count"] += 1
+            shape["total"] += record["duration_ms"]
+            shape["views"][record.get("view") or "-"] += 1
+            if record["duration_ms"] >= shape["max"]:
+                shape["max"] = record["duration_ms"]
+                shape["record"] = record
+        if not shapes:
+            raise CommandError(f"В журнале {file} нет записей")
+        ranked = sorted(
+            shapes.items(), key=lambda item: item[1]["total"], reverse=True
+        )
+        for sql, shape in ranked[:limit]:
+            record = shape["record"]
+            views = ", ".join(
+                f"{view} ({count})"
+                for view, count in sorted(
+                    shape["views"].items(), key=lambda item: -item[1]
+                )
+            )
+            self.stdout.write(self.style.WARNING(
+                f"{shape['total']:.1f} мс всего, {shape['count']} раз, "
+                f"в среднем {shape['total'] / shape['count']:.1f} мс, "
+                f"максимум {shape['max']:.1f} мс"
+            ))
+            self.stdout.write(f"  {sql}")
+            self.stdout.write(f"  view: {views}")
+            self.stdout.write(f"  вызов: {record.get('caller') or '-'}")
+            for step in record.get("plan") or ():
+                self.stdout.write(f"    {step}")
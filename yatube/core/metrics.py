@@ -0,0 +1,220 @@
+"""Реестр метрик процесса в текстовом формате Prometheus.
+
+У каждого воркера свой реестр; запись — словарь и счётчики под
+коротким lock, без обращений к базе или кешу. При нескольких воркерах
+/metrics отвечает значениями того процесса, что принял запрос:
+собирайте метрики с каждого воркера отдельно, различать их помогает
+yatube_process_info{pid=...}.
+"""
+import bisect
+import os
+import threading
+from collections import defaultdict
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [
+        *zip(names, values),
+        *extra,
+    ]
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        for labels, value in sorted(self.snapshot().items()):
+            yield self.name + _format_labels(self.labels, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики по корзинам (+Inf последней), сумма]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [
+                    [0] * (len(self.buckets) + 1), 0.0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            values = {
+                labels: (list(counts), total)
+                for labels, (counts, total) in self._values.items()
+            }
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            bounds = (*map(_format_value, self.buckets), "+Inf")
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield (
+                    self.name + "_bucket"
+                    + _format_labels(self.labels, labels, (("le", bound),)),
+                    cumulative,
+                )
+            label_text = _format_labels(self.labels, labels)
+            yield self.name + "_sum" + label_text, total
+            yield self.name + "_count" + label_text, cumulative
+
+
+class CallbackGauge:
+    """Значение считается при выдаче: callback() -> {labels: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in sorted(self.callback().items()):
+            yield self.name + _format_labels(self.labels, labels), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), **kwargs):
+        return self.register(
+            Histogram(name, documentation, labels, **kwargs)
+        )
+
+    def gauge(self, name, documentation, labels, callback):
+        return self.register(
+            CallbackGauge(name, documentation, labels, callback)
+        )
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(
+                f"{sample} {_format_value(value)}"
+                for sample, value in metric.samples()
+            )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "yatube_request_duration_seconds",
+    "Время ответа по имени URL",
+    ("view",),
+)
+REQUEST_QUERIES = REGISTRY.histogram(
+    "yatube_request_db_queries",
+    "Число запросов к базе за ответ по имени URL",
+    ("view",),
+    buckets=QUERY_BUCKETS,
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "yatube_feed_cache_requests_total",
+    "Обращения к кешу лент по слоям",
+    ("layer", "result"),
+)
+THUMBNAIL_LATENCY = REGISTRY.histogram(
+    "yatube_thumbnail_duration_seconds",
+    "Время создания миниатюры",
+    ("result",),
+)
+
+
+def _cache_hit_ratio():
+    values = CACHE_REQUESTS.snapshot()
+    ratios = {}
+    for layer in {layer for layer, _ in values}:
+        hits = values.get((layer, "hit"), 0)
+        total = hits + values.get((layer, "miss"), 0)
+        if total:
+            ratios[(layer,)] = hits / total
+    return ratios
+
+
+REGISTRY.gauge(
+    "yatube_feed_cache_hit_ratio",
+    "Доля попаданий в кеш лент по слоям",
+    ("layer",),
+    _cache_hit_ratio,
+)
+REGISTRY.gauge(
+    "yatube_process_info",
+    "Процесс, отдавший метрики",
+    ("pid",),
+    lambda: {(os.getpid(),): 1},
+)
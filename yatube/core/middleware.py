@@ -0,0 +1,86 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentation, slow_queries
+from .metrics import REQUEST_LATENCY, REQUEST_QUERIES
+
+logger = logging.getLogger("core.timing")
+
+
+class ServerTimingMiddleware:
+    """Заголовок Server-Timing и строка лога с метриками запроса.
+
+    При SERVER_TIMING = False Django убирает middleware из цепочки,
+    и запросы не платят за замер ничего.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        with instrumentation.measure() as metrics:
+            response = self.get_response(request)
+        total = metrics.total_time
+        response["Server-Timing"] = ", ".join((
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries"',
+            f"tpl;dur={metrics.template_time * 1000:.1f}",
+            f'cache;desc="hit={metrics.cache_hits} '
+            f'miss={metrics.cache_misses}"',
+            f"total;dur={total * 1000:.1f}",
+        ))
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+            "db_ms": round(metrics.db_time * 1000, 1),
+            "queries": metrics.queries,
+            "template_ms": round(metrics.template_time * 1000, 1),
+            "cache_hits": metrics.cache_hits,
+            "cache_misses": metrics.cache_misses,
+        }))
+        return response
+
+
+class MetricsMiddleware:
+    """Гистограммы времени ответа и числа запросов по имени URL."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with instrumentation.measure() as metrics:
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        REQUEST_LATENCY.observe(metrics.total_time, view)
+        REQUEST_QUERIES.observe(metrics.queries, view)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Запоминает имя view для записей журнала медленных запросов."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = slow_queries.current_view.set(request.path)
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.current_view.set(request.resolver_match.view_name)
@@ -0,0 +1,113 @@
+"""Журнал медленных запросов ORM с планом выполнения.
+
+Включается настройкой SLOW_QUERY_LOG: на каждое новое соединение
+вешается execute_wrapper, запросы дольше SLOW_QUERY_THRESHOLD_MS
+пишутся строкой JSON в ротируемый файл SLOW_QUERY_LOG_FILE.
+"""
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("core.slow_queries")
+logger.propagate = False
+
+current_view = ContextVar("slow_query_view", default=None)
+_explaining = ContextVar("slow_query_explaining", default=False)
+_handler = None
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+SPACES = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """Запрос без литералов и с IN (...) вместо списков параметров."""
+    sql = IN_LIST.sub("IN (...)", sql)
+    sql = LITERAL.sub("?", sql)
+    return SPACES.sub(" ", sql).strip()
+
+
+def _get_logger():
+    global _handler
+    path = settings.SLOW_QUERY_LOG_FILE
+    if _handler is None or _handler.baseFilename != os.path.abspath(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if _handler is not None:
+            logger.removeHandler(_handler)
+            _handler.close()
+        _handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+            encoding="utf-8",
+        )
+        logger.addHandler(_handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+def _caller():
+    # Ближайший кадр из кода проекта, а не Django и не этого модуля
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if (
+            frame.filename.startswith(settings.BASE_DIR)
+            and frame.filename != __file__
+        ):
+            path = os.path.relpath(frame.filename, settings.BASE_DIR)
+            return f"{path}:{frame.lineno} in {frame.name}"
+    return None
+
+
+def _explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return []
+    prefix = (
+        "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    )
+    token = _explaining.set(True)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f"EXPLAIN не удался: {error}"]
+    finally:
+        _explaining.reset(token)
+
+
+def log_slow_query(execute, sql, params, many, context):
+    if _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - started) * 1000
+    if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+        connection = context["connection"]
+        _get_logger().info(json.dumps({
+            "time": time.time(),
+            "duration_ms": round(duration, 3),
+            "database": connection.alias,
+            "sql": sql,
+            "params": None if many else [repr(p) for p in params or ()],
+            "view": current_view.get(),
+            "caller": _caller(),
+            "plan": [] if many else _explain(connection, sql, params),
+        }, ensure_ascii=False))
+    return result
+
+
+def install(sender, connection, **kwargs):
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def enable():
+    connection_created.connect(install, dispatch_uid="core.slow_queries")
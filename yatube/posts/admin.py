@@ -1,6 +1,32 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
 from .models import Post, Group
+from .search import filter_posts
+
+COUNT_KEY = "admin:count:{}"
+
+
+class CachedCountPaginator(Paginator):
+    """Кэширует COUNT(*) выборки, чтобы не считать таблицу на каждой
+    странице списка."""
+
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        key = COUNT_KEY.format(
+            hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, settings.ADMIN_COUNT_TIMEOUT)
+        return count
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,13 +38,31 @@ class PostAdmin(admin.ModelAdmin):
         "group",
     )
     list_editable = ("group",)
+    list_select_related = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по FTS5-индексу вместо LIKE '%...%' по всей таблице
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == "group" and field is not None:
+            # Список групп читается один раз, а не в каждой строке
+            # list_editable
+            field.choices = list(field.choices)
+        return field
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ("title", "description")
+    list_display = ("title", "description", "posts_count")
+    paginator = CachedCountPaginator
 
 
 admin.site.register(Post, PostAdmin)
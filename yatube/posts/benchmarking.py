@@ -0,0 +1,38 @@
+"""Общие части команд bench и loadtest."""
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import Http404, HttpResponseNotFound
+from django.views.static import serve
+
+
+def percentile(samples, q):
+    """Перцентиль с линейной интерполяцией по отсортированной выборке."""
+    position = (len(samples) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(samples) - 1)
+    return samples[low] + (samples[high] - samples[low]) * (position - low)
+
+
+class MediaFilesApp:
+    """WSGI-обёртка: MEDIA_URL отдаёт django.views.static.serve,
+    остальное — приложение. Для серверов замеров, где DEBUG выключен
+    и urls.py медиа не раздаёт."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if not path.startswith(settings.MEDIA_URL):
+            return self.application(environ, start_response)
+        request = WSGIRequest(environ)
+        try:
+            response = serve(
+                request, path[len(settings.MEDIA_URL):],
+                document_root=settings.MEDIA_ROOT,
+            )
+        except Http404:
+            response = HttpResponseNotFound()
+        status = f"{response.status_code} {response.reason_phrase}"
+        start_response(status, list(response.items()))
+        return response
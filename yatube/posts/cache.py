@@ -0,0 +1,229 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+from core.instrumentation import record_cache
+from core.metrics import CACHE_REQUESTS
+
+GENERATION_KEY = "feed:generation:{}"
+FRAGMENT_KEY = "feed:fragment:{}:{}:{}:{}"
+PAGE_KEY = "feed:page:{}:{}:{}"
+LOOKUP_KEY = "feed:lookup:{}:{}"
+CARD_KEY = "feed:card:{}:{}:{}"
+PAGE_PARAMS = ("page", "after", "before")
+# Поколение всего сайта: меняется, когда меняются группы,
+# ссылки на которые есть в карточках любой ленты
+SITE_SCOPE = "site"
+
+
+def feed_scope(kind, pk=None):
+    return kind if pk is None else f"{kind}:{pk}"
+
+
+def post_scopes(author_id, group_ids=(), post_id=None):
+    scopes = {feed_scope("index"), feed_scope("author", author_id)}
+    if post_id is not None:
+        scopes.add(feed_scope("post", post_id))
+    scopes.update(
+        feed_scope("group", group_id)
+        for group_id in group_ids if group_id is not None
+    )
+    return scopes
+
+
+def _new_generation():
+    # Поколение от времени: после вытеснения ключа из кеша новое значение
+    # не совпадёт ни с одним из старых
+    return time.time_ns() // 1000
+
+
+def get_generations(*scopes):
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _new_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def _bump(scopes):
+    # Новое поколение — время изменения, по нему же отдаётся Last-Modified
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    current = cache.get_many(keys)
+    cache.set_many(
+        {
+            key: max(current.get(key, 0) + 1, _new_generation())
+            for key in keys
+        },
+        None,
+    )
+
+
+def bump_generations(scopes):
+    scopes = set(scopes)
+    _bump(scopes)
+    # Страница, отрисованная до фиксации транзакции, попала бы в кеш
+    # под новым поколением, поэтому повторяем сброс после commit
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def lookup_key(kind, value):
+    value = hashlib.md5(str(value).encode()).hexdigest()
+    return LOOKUP_KEY.format(kind, value)
+
+
+def get_lookup(kind, value):
+    """Неизменяемое соответствие (слаг -> pk и т.п.), которое view
+    запомнил при прошлом показе страницы; без запросов к базе."""
+    return cache.get(lookup_key(kind, value))
+
+
+def set_lookup(kind, value, result):
+    cache.set(lookup_key(kind, value), result, settings.FEED_CACHE_TIMEOUT)
+
+
+def page_key(request):
+    return "|".join(request.GET.get(param, "") for param in PAGE_PARAMS)
+
+
+def fragment_key(scope, request):
+    site, generation = get_generations(SITE_SCOPE, scope)
+    return FRAGMENT_KEY.format(scope, site, generation, page_key(request))
+
+
+def record(hit, layer="fragment"):
+    CACHE_REQUESTS.inc(layer, "hit" if hit else "miss")
+    record_cache(hit)
+
+
+def get_fragment(key):
+    fragment = cache.get(key)
+    record(fragment is not None)
+    return fragment
+
+
+def set_fragment(key, fragment):
+    cache.set(key, fragment, settings.FEED_CACHE_TIMEOUT)
+
+
+def card_key(post, site):
+    return CARD_KEY.format(post.pk, post.version, site)
+
+
+def get_cards(posts):
+    """Карточки постов из кеша одним запросом: {pk: html}."""
+    site, = get_generations(SITE_SCOPE)
+    keys = {card_key(post, site): post.pk for post in posts}
+    found = cache.get_many(keys)
+    for key in keys:
+        record(key in found, layer="card")
+    return {keys[key]: card for key, card in found.items()}, site
+
+
+def set_cards(posts, cards, site):
+    cache.set_many(
+        {card_key(post, site): cards[post.pk] for post in posts},
+        settings.FEED_CACHE_TIMEOUT,
+    )
+
+
+def cache_stats():
+    values = CACHE_REQUESTS.snapshot()
+    return {
+        layer: {
+            "hits": values.get((layer, "hit"), 0),
+            "misses": values.get((layer, "miss"), 0),
+        }
+        for layer in ("fragment", "page", "card")
+    }
+
+
+def anonymous_page_key(request):
+    # Любой пост виден на главной, поэтому её поколение
+    # сбрасывается при каждом изменении постов
+    site, generation = get_generations(SITE_SCOPE, feed_scope("index"))
+    # Как fragment_key: только параметры страницы, остальная строка
+    # запроса (utm-метки и т.п.) не плодит копий в кеше
+    path = hashlib.md5(
+        f"{request.path}?{page_key(request)}".encode()
+    ).hexdigest()
+    return PAGE_KEY.format(site, generation, path)
+
+
+def is_cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_USED")
+        and "private" not in response.get("Cache-Control", "")
+    )
+
+
+def cache_anonymous_page(view):
+    """Кеширует ответ целиком для анонимных GET-запросов.
+
+    Шапка и формы с CSRF зависят от пользователя, поэтому
+    авторизованным всегда отдаётся свежая страница.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ("GET", "HEAD")
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        key = anonymous_page_key(request)
+        response = cache.get(key)
+        record(response is not None, layer="page")
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if is_cacheable(request, response):
+                cache.set(key, response, settings.ANONYMOUS_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+def conditional_feed(scopes_for):
+    """Отвечает 304 на If-None-Match/If-Modified-Since до работы view.
+
+    scopes_for(**kwargs) возвращает поколения, от которых зависит
+    страница, или None, если их пока не узнать без базы — тогда
+    страница просто строится. Валидаторы строятся только по кешу.
+    """
+    def generations(request, *args, **kwargs):
+        if not hasattr(request, "_feed_generations"):
+            scopes = scopes_for(*args, **kwargs)
+            request._feed_generations = (
+                None if scopes is None
+                else get_generations(SITE_SCOPE, *scopes)
+            )
+        return request._feed_generations
+
+    def etag(request, *args, **kwargs):
+        current = generations(request, *args, **kwargs)
+        if current is None:
+            return None
+        # Шапка и CSRF-токен в формах зависят от пользователя
+        parts = (
+            page_key(request),
+            str(request.user.pk),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+            *map(str, current),
+        )
+        return hashlib.md5(":".join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        current = generations(request, *args, **kwargs)
+        if current is None:
+            return None
+        return datetime.fromtimestamp(max(current) / 10 ** 6, timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,117 @@
+from collections import Counter
+
+from django.db.models import Count, F
+
+from .models import AuthorCounter, Comment, Follow, Group, Post
+
+
+def change_group_count(group_id, delta):
+    if group_id is None or not delta:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F("posts_count") + delta)
+
+
+def change_author_count(author_id, delta, field="posts_count"):
+    if not delta:
+        return
+    counters = AuthorCounter.objects.filter(author_id=author_id)
+    if delta < 0:
+        counters.filter(**{f"{field}__gte": -delta}).update(
+            **{field: F(field) + delta}
+        )
+        return
+    if not counters.update(**{field: F(field) + delta}):
+        # Счётчика ещё нет: заводим его по фактическим числам
+        AuthorCounter.objects.update_or_create(
+            author_id=author_id,
+            defaults={
+                "posts_count": Post.objects.filter(
+                    author_id=author_id
+                ).count(),
+                "followers_count": Follow.objects.filter(
+                    author_id=author_id
+                ).count(),
+            },
+        )
+
+
+def change_follower_count(author_id, delta):
+    change_author_count(author_id, delta, field="followers_count")
+
+
+def change_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(
+        comment_count=F("comment_count") + delta, version=F("version") + 1
+    )
+
+
+def count_new_posts(posts):
+    groups = Counter(post.group_id for post in posts)
+    authors = Counter(post.author_id for post in posts)
+    for group_id, delta in groups.items():
+        change_group_count(group_id, delta)
+    for author_id, delta in authors.items():
+        change_author_count(author_id, delta)
+
+
+def author_posts_count(author):
+    try:
+        return author.post_counter.posts_count
+    except AuthorCounter.DoesNotExist:
+        return None
+
+
+def rebuild_counters():
+    group_counts = dict(
+        Post.objects.filter(group__isnull=False)
+        .values_list("group")
+        .annotate(total=Count("pk"))
+        .order_by()
+    )
+    groups = list(Group.objects.only("pk", "posts_count"))
+    for group in groups:
+        group.posts_count = group_counts.get(group.pk, 0)
+    Group.objects.bulk_update(groups, ["posts_count"], batch_size=500)
+
+    author_counts = dict(
+        Post.objects.values_list("author").annotate(total=Count("pk"))
+        .order_by()
+    )
+    follower_counts = dict(
+        Follow.objects.values_list("author").annotate(total=Count("pk"))
+        .order_by()
+    )
+    AuthorCounter.objects.all().delete()
+    AuthorCounter.objects.bulk_create(
+        (
+            AuthorCounter(
+                author_id=author_id,
+                posts_count=author_counts.get(author_id, 0),
+                followers_count=follower_counts.get(author_id, 0),
+            )
+            for author_id in author_counts.keys() | follower_counts.keys()
+        ),
+        batch_size=500,
+    )
+
+    comment_counts = dict(
+        Comment.objects.values_list("post").annotate(total=Count("pk"))
+        .order_by()
+    )
+    Post.objects.exclude(comment_count=0).update(
+        comment_count=0, version=F("version") + 1
+    )
+    posts = [
+        Post(pk=post_id, comment_count=total, version=F("version") + 1)
+        for post_id, total in comment_counts.items()
+    ]
+    Post.objects.bulk_update(
+        posts, ["comment_count", "version"], batch_size=500
+    )
+    return len(groups), AuthorCounter.objects.count(), len(posts)
@@ -0,0 +1,102 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Group, Post
+
+# Те же поля, что понимает import_posts
+FIELDS = (
+    "type", "id", "text", "author", "group", "pub_date",
+    "post", "created", "slug", "title", "description",
+)
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CHUNK_SIZE = 2000
+
+
+def parse_bound(value, end=False):
+    """Граница периода: дата-время или дата (весь день включительно)."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Неверная дата: {value}")
+        moment = datetime.combine(day, time.max if end else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def select_posts(since=None, until=None, group=None, author=None):
+    posts = Post.objects.all()
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lte=until)
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    return posts
+
+
+def export_rows(posts, comments=True):
+    """Строки для выгрузки; посты и комментарии читаются с сервера
+    порциями, так что память не зависит от размера таблицы."""
+    groups = Group.objects.filter(
+        pk__in=posts.order_by().values("group")
+    ).order_by("pk")
+    for slug, title, description in groups.values_list(
+        "slug", "title", "description"
+    ).iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            "type": "group", "slug": slug, "title": title,
+            "description": description,
+        }
+    rows = posts.order_by("pk").values_list(
+        "pk", "text", "author__username", "group__slug", "pub_date"
+    )
+    for pk, text, author, group, pub_date in rows.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield {
+            "type": "post", "id": pk, "text": text, "author": author,
+            "group": group, "pub_date": pub_date.isoformat(),
+        }
+    if not comments:
+        return
+    rows = (
+        Comment.objects.filter(post__in=posts.order_by().values("pk"))
+        .order_by("pk")
+        .values_list("post", "author__username", "text", "created")
+    )
+    for post, author, text, created in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            "type": "comment", "post": post, "author": author,
+            "text": text, "created": created.isoformat(),
+        }
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def render_rows(rows, fmt):
+    if fmt == "csv":
+        writer = csv.DictWriter(Echo(), FIELDS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
@@ -0,0 +1,73 @@
+import time
+
+from django.core.files.images import get_image_dimensions
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts.cache import SITE_SCOPE, bump_generations
+from posts.models import Post
+from posts.thumbnails import feed_thumbnail, logger
+
+FIELDS = (
+    "image_width",
+    "image_height",
+    "thumbnail",
+    "thumbnail_width",
+    "thumbnail_height",
+)
+
+
+class Command(BaseCommand):
+    help = "Заполняет размеры картинок и миниатюры у существующих постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200,
+            help="Сколько постов обрабатывать за раз",
+        )
+
+    def fill(self, post):
+        with post.image.storage.open(post.image.name) as image:
+            post.image_width, post.image_height = get_image_dimensions(image)
+        thumb = feed_thumbnail(post.image)
+        if thumb.size:
+            post.thumbnail = thumb.name
+            post.thumbnail_width, post.thumbnail_height = thumb.size
+
+    def handle(self, *args, chunk_size, **options):
+        posts = (
+            Post.objects.exclude(image="")
+            .filter(Q(image_width__isnull=True) | Q(thumbnail=""))
+            .order_by("pk")
+            .only("pk", "image", *FIELDS)
+        )
+        started = time.monotonic()
+        last_pk = done = failed = 0
+        while True:
+            # Идём по первичному ключу, чтобы не держать в памяти всю выборку
+            chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            filled = []
+            for post in chunk:
+                try:
+                    self.fill(post)
+                except Exception:
+                    logger.exception("Не удалось обработать пост %s", post.pk)
+                    failed += 1
+                else:
+                    post.version = F("version") + 1
+                    filled.append(post)
+            Post.objects.bulk_update(filled, (*FIELDS, "version"))
+            done += len(filled)
+            self.stdout.write(f"Обработано постов: {done}")
+        if done:
+            # Карточки без картинки закешированы во всех лентах сразу
+            bump_generations((SITE_SCOPE,))
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: {done}, ошибок: {failed}, "
+            f"за {time.monotonic() - started:.1f} с"
+        ))
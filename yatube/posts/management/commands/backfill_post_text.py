@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from posts.cache import SITE_SCOPE, bump_generations
+from posts.models import Post
+from posts.text import fill_text_fields
+
+FIELDS = ("text_html", "preview_html", "version")
+
+
+class Command(BaseCommand):
+    help = "Заполняет HTML и короткую версию текста у существующих постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько постов обрабатывать за раз",
+        )
+        parser.add_argument(
+            "--all",
+            dest="all_posts",
+            action="store_true",
+            help="Пересчитать все посты, а не только незаполненные",
+        )
+
+    def handle(self, *args, chunk_size, all_posts, **options):
+        posts = Post.objects.order_by("pk").only("pk", "text")
+        if not all_posts:
+            posts = posts.filter(text_html="")
+        started = time.monotonic()
+        last_pk = done = 0
+        while True:
+            # Идём по первичному ключу, чтобы не держать в памяти всю выборку
+            chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            for post in chunk:
+                fill_text_fields(post)
+                post.version = F("version") + 1
+            Post.objects.bulk_update(chunk, FIELDS)
+            done += len(chunk)
+            self.stdout.write(f"Обработано постов: {done}")
+        if done:
+            # Карточки со старым текстом закешированы во всех лентах
+            bump_generations((SITE_SCOPE,))
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: {done}, за {time.monotonic() - started:.1f} с"
+        ))
@@ -0,0 +1,230 @@
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.loader import get_template
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from posts.benchmarking import percentile
+from posts.models import Group, Post, User
+from posts.seeding import seed_dataset
+from posts.thumbnails import attach_thumbnails, feed_thumbnail
+from posts.utils import encode_cursor, pagenator
+
+PERCENTILES = (50, 90, 99)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    stats = {
+        "runs": len(samples),
+        "min_ms": samples[0],
+        "mean_ms": statistics.fmean(samples),
+        "max_ms": samples[-1],
+    }
+    for q in PERCENTILES:
+        stats[f"p{q}_ms"] = percentile(samples, q)
+    stats["median_ms"] = stats["p50_ms"]
+    return {key: round(value, 4) for key, value in stats.items()}
+
+
+def measure(func, warmup, repeat):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def feed_page(queryset=None):
+    if queryset is None:
+        queryset = Post.objects.all()
+    return list(queryset.feed()[:settings.COUNT])
+
+
+def feed_query():
+    return feed_page
+
+
+def group_feed_query():
+    group = Group.objects.order_by("pk").first()
+    return lambda: feed_page(group.posts.all())
+
+
+def paginate():
+    request = RequestFactory().get("/", {"page": 3})
+    return lambda: list(pagenator(request, Post.objects.feed()).object_list)
+
+
+def paginate_cursor():
+    cursor = encode_cursor(Post.objects.feed()[settings.COUNT * 3])
+    request = RequestFactory().get("/", {"after": cursor})
+    return lambda: list(pagenator(request, Post.objects.feed()).object_list)
+
+
+def render_article():
+    template = get_template("posts/includes/article.html")
+    posts = attach_thumbnails(feed_page())
+
+    def run():
+        for post in posts:
+            template.render({"post": post})
+    return run
+
+
+def render_paginator():
+    template = get_template("posts/includes/paginator.html")
+    request = RequestFactory().get("/", {"page": 50})
+    page_obj = pagenator(request, Post.objects.feed())
+    list(page_obj.object_list)
+    return lambda: template.render({"page_obj": page_obj, "page_query": ""})
+
+
+def thumbnail_lookups():
+    posts = feed_page(Post.objects.exclude(image=""))
+    # Миниатюры уже есть в хранилище sorl, но не записаны в пост:
+    # так замеряется поиск по ключам, а не создание картинок
+    for post in posts:
+        feed_thumbnail(post.image)
+    return lambda: attach_thumbnails(posts)
+
+
+def add_comment():
+    client = Client()
+    client.force_login(User.objects.order_by("pk").first())
+    url = reverse(
+        "posts:add_comment",
+        kwargs={"post_id": Post.objects.order_by("-pub_date").first().pk},
+    )
+    return lambda: client.post(url, {"text": "Замер"})
+
+
+# Имя -> функция подготовки, возвращающая замеряемый вызов
+COMPONENTS = {
+    "feed_query": feed_query,
+    "group_feed_query": group_feed_query,
+    "pagenator": paginate,
+    "pagenator_cursor": paginate_cursor,
+    "render_article": render_article,
+    "render_paginator": render_paginator,
+    "thumbnail_lookups": thumbnail_lookups,
+    "add_comment": add_comment,
+}
+
+
+def run_benchmarks(names, warmup, repeat):
+    return {
+        name: measure(COMPONENTS[name](), warmup, repeat) for name in names
+    }
+
+
+def compare(results, baseline, threshold):
+    """Строки сравнения медиан с базовыми и список регрессий."""
+    lines, regressions = [], []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            lines.append(f"{name}: нет в базовых результатах")
+            continue
+        change = stats["median_ms"] / base["median_ms"] - 1
+        line = (
+            f"{name}: {base['median_ms']:.3f} -> "
+            f"{stats['median_ms']:.3f} мс ({change:+.1%})"
+        )
+        if change > threshold:
+            regressions.append(name)
+            line += " РЕГРЕССИЯ"
+        lines.append(line)
+    return lines, regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет ленты, пагинацию, шаблоны, миниатюры и комментарии "
+        "на детерминированных данных в отдельной тестовой базе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--only", nargs="+", choices=list(COMPONENTS),
+            help="Замерить только эти компоненты",
+        )
+        parser.add_argument("--output", help="Куда записать JSON")
+        parser.add_argument("--baseline", help="JSON прошлого замера")
+        parser.add_argument(
+            "--threshold", type=float, default=0.1,
+            help="Допустимый рост медианы, доля (0.1 = 10%%)",
+        )
+
+    def handle(self, *args, posts, seed, warmup, repeat, only, output,
+               baseline, threshold, **options):
+        if repeat < 1:
+            raise CommandError("--repeat должен быть положительным")
+        if baseline:
+            with open(baseline, encoding="utf-8") as stream:
+                baseline = json.load(stream)["results"]
+        names = only or list(COMPONENTS)
+        media_root = tempfile.mkdtemp()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                THUMBNAIL_WORKERS=0,
+                CACHES={"default": {
+                    "BACKEND":
+                        "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "bench",
+                }},
+            ):
+                seeded = seed_dataset(posts=posts, seed=seed)
+                results = run_benchmarks(names, warmup, repeat)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+        report = {
+            "meta": {
+                "seed": seed,
+                "warmup": warmup,
+                "repeat": repeat,
+                "dataset": seeded,
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+            },
+            "results": results,
+        }
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<20} median {stats['median_ms']:8.3f}  "
+                f"p90 {stats['p90_ms']:8.3f}  p99 {stats['p99_ms']:8.3f} мс"
+            )
+        if output:
+            with open(output, "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
+        if baseline:
+            lines, regressions = compare(results, baseline, threshold)
+            for line in lines:
+                self.stdout.write(line)
+            if regressions:
+                raise CommandError(
+                    "Медиана выросла больше чем на "
+                    f"{threshold:.0%}: {', '.join(regressions)}"
+                )
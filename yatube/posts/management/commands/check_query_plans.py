@@ -0,0 +1,76 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Comment, Post
+from posts.timeline import timeline
+from posts.utils import CursorPaginator
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    return [
+        step for step in plan
+        if FULL_SCAN.match(step) or TEMP_SORT in step
+    ]
+
+
+def feed_queries():
+    per_page = settings.COUNT
+    cursor = (timezone.now(), 0)
+    paginator = CursorPaginator(Post.objects.feed(), per_page)
+    entries, fields = timeline(0)[0]
+    follow = CursorPaginator(entries, per_page, fields)
+    popular = CursorPaginator(
+        Post.objects.feed().filter(author_id=0), per_page
+    )
+    return {
+        "index": Post.objects.feed()[:per_page],
+        "index_count": Post.objects.order_by().values("pk"),
+        "group": Post.objects.feed().filter(group_id=0)[:per_page],
+        "profile": Post.objects.feed().filter(author_id=0)[:per_page],
+        "cursor_after": paginator.seek_after(cursor)[:per_page],
+        "cursor_before": paginator.seek_before(cursor)[:per_page],
+        "follow_after": follow.seek_after(cursor)[:per_page],
+        "follow_before": follow.seek_before(cursor)[:per_page],
+        "popular_after": popular.seek_after(cursor)[:per_page],
+        "detail": Post.objects.feed().filter(pk=0),
+        "comments": Comment.objects.filter(post_id=0).order_by("-created"),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет EXPLAIN QUERY PLAN запросов лент: "
+        "полный просмотр таблицы или временная сортировка — ошибка"
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Проверка планов поддерживает только SQLite")
+        failed = []
+        for name, queryset in feed_queries().items():
+            plan = explain(queryset)
+            problems = plan_problems(plan)
+            style = self.style.ERROR if problems else self.style.SUCCESS
+            self.stdout.write(style(name))
+            for step in plan:
+                self.stdout.write(f"    {step}")
+            if problems:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                "Неэффективные планы запросов: " + ", ".join(failed)
+            )
@@ -0,0 +1,58 @@
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import export_rows, parse_bound, render_rows, select_posts
+
+
+class Command(BaseCommand):
+    help = "Выгружает посты и комментарии в NDJSON или CSV потоком"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-", help="Файл для выгрузки, «-» — stdout"
+        )
+        parser.add_argument(
+            "--format", dest="fmt", choices=("ndjson", "csv"),
+            default="ndjson",
+        )
+        parser.add_argument("--since", help="С даты (включительно)")
+        parser.add_argument("--until", help="По дату (включительно)")
+        parser.add_argument("--group", help="Слаг группы")
+        parser.add_argument("--author", help="Имя автора")
+        parser.add_argument(
+            "--no-comments", action="store_true",
+            help="Не выгружать комментарии",
+        )
+
+    def handle(self, *args, output, fmt, since, until, group, author,
+               no_comments, **options):
+        try:
+            posts = select_posts(
+                parse_bound(since), parse_bound(until, end=True),
+                group, author,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        stream = None
+        if output == "-":
+            write = partial(self.stdout.write, ending="")
+        else:
+            stream = open(output, "w", encoding="utf-8", newline="")
+            write = stream.write
+        started = time.monotonic()
+        rows = 0
+        try:
+            for line in render_rows(
+                export_rows(posts, comments=not no_comments), fmt
+            ):
+                write(line)
+                rows += 1
+        finally:
+            if stream is not None:
+                stream.close()
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f"Строк: {rows}, {rows / max(elapsed, 1e-6):.0f} в секунду"
+        )
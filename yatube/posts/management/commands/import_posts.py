@@ -0,0 +1,244 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.cache import SITE_SCOPE, bump_generations, post_scopes
+from posts.counters import change_comment_count, count_new_posts
+from posts.models import Comment, Group, Post
+from posts.seeding import insert_rows
+from posts.text import fill_text_fields
+from posts.timeline import fan_out_posts
+
+User = get_user_model()
+
+ROW_TYPES = ("group", "post", "comment")
+POST_FIELDS = (
+    "id", "text", "text_html", "preview_html", "author_id", "group_id",
+    "pub_date",
+)
+COMMENT_FIELDS = ("post_id", "author_id", "text", "created")
+
+
+def read_rows(stream, fmt):
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value != ""}
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def date_value(date):
+    return connection.ops.adapt_datetimefield_value(date)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise CommandError(f"Неверная дата: {value}")
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает группы, посты и комментарии из NDJSON или CSV "
+        "(файл или stdin)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-",
+            help="Файл для загрузки, «-» — stdin",
+        )
+        parser.add_argument(
+            "--format",
+            dest="fmt",
+            choices=("ndjson", "csv"),
+            help="Формат; по умолчанию определяется по расширению",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько строк записывать в одной транзакции",
+        )
+
+    def handle(self, *args, path, fmt, batch_size, **options):
+        fmt = fmt or ("csv" if path.endswith(".csv") else "ndjson")
+        if path == "-":
+            stream = sys.stdin
+        else:
+            stream = open(path, encoding="utf-8", newline="")
+        self.totals = dict.fromkeys(ROW_TYPES, 0)
+        self.batch_size = batch_size
+        started = time.monotonic()
+        rows = 0
+        try:
+            for chunk in chunks(read_rows(stream, fmt), batch_size):
+                with transaction.atomic():
+                    self.import_chunk(chunk)
+                rows += len(chunk)
+                speed = rows / max(time.monotonic() - started, 1e-6)
+                self.stderr.write(f"Строк: {rows}, {speed:.0f} в секунду")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Групп: {self.totals['group']}, постов: {self.totals['post']}, "
+            f"комментариев: {self.totals['comment']}, "
+            f"за {time.monotonic() - started:.1f} с"
+        ))
+
+    def import_chunk(self, chunk):
+        by_type = {row_type: [] for row_type in ROW_TYPES}
+        for row in chunk:
+            row_type = row.get("type", "post")
+            if row_type not in by_type:
+                raise CommandError(f"Неизвестный тип строки: {row_type}")
+            by_type[row_type].append(row)
+        groups, groups_changed = self.save_groups(
+            by_type["group"],
+            {row["group"] for row in by_type["post"] if row.get("group")},
+        )
+        authors = self.save_authors(
+            {row["author"] for row in by_type["post"] + by_type["comment"]}
+        )
+        posts = [
+            Post(
+                # В CSV числа приходят строками
+                pk=int(row["id"]) if "id" in row else None,
+                text=row["text"],
+                author_id=authors[row["author"]],
+                group_id=groups.get(row.get("group")),
+                pub_date=parse_date(row.get("pub_date")),
+            )
+            for row in by_type["post"]
+        ]
+        self.insert_posts(posts)
+        # Даты из файла пишем напрямую: bulk_create подставил бы
+        # auto_now_add, а сигналы при пакетной записи не вызываются
+        comments = Counter(int(row["post"]) for row in by_type["comment"])
+        insert_rows(
+            Comment, COMMENT_FIELDS,
+            (
+                (
+                    int(row["post"]), authors[row["author"]], row["text"],
+                    date_value(parse_date(row.get("created"))),
+                )
+                for row in by_type["comment"]
+            ),
+            self.batch_size,
+        )
+        for post_id, delta in comments.items():
+            change_comment_count(post_id, delta)
+        scopes = set().union(*(
+            post_scopes(post.author_id, (post.group_id,)) for post in posts
+        ))
+        for post_id, author_id, group_id in Post.objects.filter(
+            pk__in=comments
+        ).values_list("pk", "author_id", "group_id"):
+            scopes.update(post_scopes(author_id, (group_id,), post_id))
+        if groups_changed:
+            # Названия групп есть в карточках любой ленты
+            scopes.add(SITE_SCOPE)
+        bump_generations(scopes)
+        for row_type, rows in by_type.items():
+            self.totals[row_type] += len(rows)
+
+    def insert_posts(self, posts):
+        """Посты с датами из файла; id без заданного раздаём сами, чтобы
+        разложить посты по лентам подписчиков."""
+        if not posts:
+            return
+        next_pk = max(
+            Post.objects.aggregate(Max("pk"))["pk__max"] or 0,
+            *(post.pk or 0 for post in posts),
+        ) + 1
+        for post in posts:
+            if post.pk is None:
+                post.pk = next_pk
+                next_pk += 1
+            fill_text_fields(post)
+        # Поисковый индекс заполняют триггеры
+        insert_rows(
+            Post, POST_FIELDS,
+            (
+                (
+                    post.pk, post.text, post.text_html, post.preview_html,
+                    post.author_id, post.group_id, date_value(post.pub_date),
+                )
+                for post in posts
+            ),
+            self.batch_size,
+        )
+        count_new_posts(posts)
+        fan_out_posts(posts)
+
+    def save_groups(self, rows, referenced):
+        """{slug: pk} групп и признак, что существующие группы менялись."""
+        slugs = {row["slug"] for row in rows} | referenced
+        existing = Group.objects.filter(slug__in=slugs).in_bulk(
+            field_name="slug"
+        )
+        changed, new = [], {}
+        for row in rows:
+            group = existing.get(row["slug"]) or new.setdefault(
+                row["slug"], Group(slug=row["slug"])
+            )
+            group.title = row.get("title", row["slug"])
+            group.description = row.get("description", "")
+            if group.pk:
+                changed.append(group)
+        for slug in referenced - existing.keys() - new.keys():
+            new[slug] = Group(slug=slug, title=slug, description="")
+        Group.objects.bulk_update(changed, ("title", "description"))
+        Group.objects.bulk_create(new.values())
+        pks = dict(
+            Group.objects.filter(slug__in=slugs).values_list("slug", "pk")
+        )
+        return pks, bool(changed)
+
+    def save_authors(self, usernames):
+        authors = dict(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", "pk"
+            )
+        )
+        missing = usernames - authors.keys()
+        if missing:
+            password = make_password(None)
+            User.objects.bulk_create(
+                User(username=username, password=password)
+                for username in missing
+            )
+            authors.update(
+                User.objects.filter(username__in=missing).values_list(
+                    "username", "pk"
+                )
+            )
+        return authors
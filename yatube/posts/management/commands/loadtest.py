@@ -0,0 +1,360 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            Request, build_opener)
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test import override_settings
+
+from posts.benchmarking import MediaFilesApp, percentile
+from posts.models import Follow, Group, Post, User
+from posts.seeding import seed_dataset
+from yatube.wsgi import application
+
+ACTIONS = ("anon_read", "auth_read", "comment", "create")
+DEFAULT_MIX = "anon_read=60,auth_read=25,comment=10,create=5"
+PASSWORD = "loadtest-password"
+PERCENTILES = (50, 95, 99)
+FOLLOWS_PER_USER = 5
+
+
+def parse_mix(value):
+    """«anon_read=60,create=5» -> {действие: вес}."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise CommandError(
+                f"Неизвестное действие {name!r}, есть: {', '.join(ACTIONS)}"
+            )
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Неверный вес: {part}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError("Нужен хотя бы один положительный вес")
+    return mix
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class NoRedirect(HTTPRedirectHandler):
+    # Редирект после POST — отдельный запрос, его не замеряем
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+
+    def add(self, route, seconds, status, ok):
+        with self.lock:
+            self.latencies[route].append(seconds * 1000)
+            self.statuses[route][str(status or "error")] += 1
+            if not ok:
+                self.errors[route] += 1
+
+    def report(self, elapsed):
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            stats = {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "error_rate": self.errors[route] / len(samples),
+                "rps": len(samples) / elapsed,
+            }
+            for q in PERCENTILES:
+                stats[f"p{q}_ms"] = percentile(samples, q)
+            routes[route] = {
+                key: round(value, 4) for key, value in stats.items()
+            }
+            routes[route]["statuses"] = dict(self.statuses[route])
+        total = sum(stats["requests"] for stats in routes.values())
+        errors = sum(stats["errors"] for stats in routes.values())
+        return {
+            "elapsed": round(elapsed, 3),
+            "requests": total,
+            "errors": errors,
+            "rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+class LoadClient:
+    """Один посетитель: анонимная сессия и, по требованию, сессия
+    пользователя username; каждый запрос пишется в results."""
+
+    def __init__(self, base_url, targets, results, rng, username,
+                 timeout=10):
+        self.base_url = base_url
+        self.targets = targets
+        self.results = results
+        self.rng = rng
+        self.username = username
+        self.timeout = timeout
+        self.anonymous = self.session()
+        self.user = None
+
+    def session(self):
+        cookies = CookieJar()
+        return cookies, build_opener(HTTPCookieProcessor(cookies), NoRedirect)
+
+    def request(self, session, route, path, data=None, expect=None):
+        """expect — коды успешного ответа, по умолчанию любой < 400."""
+        cookies, opener = session
+        if data is not None:
+            token = next(
+                (c.value for c in cookies if c.name == "csrftoken"), ""
+            )
+            data = urlencode({**data, "csrfmiddlewaretoken": token}).encode()
+        started = time.perf_counter()
+        try:
+            with opener.open(
+                Request(self.base_url + path, data=data), timeout=self.timeout
+            ) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            error.read()
+            status = error.code
+        except (URLError, OSError):
+            status = None
+        if expect is None:
+            ok = status is not None and status < 400
+        else:
+            ok = status in expect
+        self.results.add(route, time.perf_counter() - started, status, ok)
+        return status
+
+    def login(self):
+        self.user = self.session()
+        self.request(self.user, "login_form", "/auth/login/")
+        self.request(self.user, "login", "/auth/login/", {
+            "username": self.username, "password": PASSWORD,
+        }, expect=(302,))
+
+    def read_path(self):
+        targets, rng = self.targets, self.rng
+        route = rng.choice(("index", "group", "profile", "post", "media"))
+        if route == "index":
+            return route, f"/?page={rng.randint(1, targets['pages'])}"
+        if route == "group":
+            return route, f"/group/{rng.choice(targets['groups'])}/"
+        if route == "profile":
+            return route, f"/profile/{rng.choice(targets['authors'])}/"
+        if route == "media" and targets["media"]:
+            return route, rng.choice(targets["media"])
+        return "post", f"/posts/{rng.choice(targets['posts'])}/"
+
+    def anon_read(self):
+        route, path = self.read_path()
+        self.request(self.anonymous, route, path)
+
+    def auth_read(self):
+        if self.rng.random() < 0.3:
+            route, path = "follow", "/follow/"
+        else:
+            route, path = self.read_path()
+        self.request(self.user, f"{route}[auth]", path)
+
+    def comment(self):
+        post_id = self.rng.choice(self.targets["posts"])
+        self.request(self.user, "comment", f"/posts/{post_id}/comment/", {
+            "text": f"Комментарий {self.rng.randrange(10 ** 6)}",
+        }, expect=(302,))
+
+    def create(self):
+        self.request(self.user, "create", "/create/", {
+            "text": f"Пост под нагрузкой {self.rng.randrange(10 ** 6)}",
+            "group": self.rng.choice(self.targets["group_ids"] + [""]),
+        }, expect=(302,))
+
+    def run(self, mix, deadline, think):
+        actions, weights = zip(*mix.items())
+        while time.monotonic() < deadline:
+            action = self.rng.choices(actions, weights)[0]
+            if action != "anon_read" and self.user is None:
+                self.login()
+            getattr(self, action)()
+            if think:
+                time.sleep(self.rng.uniform(0, 2 * think))
+
+
+def collect_targets():
+    posts = list(Post.objects.values_list("pk", "image"))
+    return {
+        "posts": [pk for pk, _ in posts],
+        "media": [
+            settings.MEDIA_URL + image for _, image in posts if image
+        ],
+        "pages": max(1, len(posts) // settings.COUNT),
+        "groups": list(Group.objects.values_list("slug", flat=True)),
+        "group_ids": list(Group.objects.values_list("pk", flat=True)),
+        "authors": list(
+            Post.objects.values_list("author__username", flat=True)
+            .distinct()
+        ),
+    }
+
+
+def prepare_users(count, seed):
+    """Пароль для count пользователей и подписки каждого на авторов."""
+    rng = random.Random(seed)
+    users = list(User.objects.order_by("pk")[:count])
+    User.objects.filter(pk__in=[user.pk for user in users]).update(
+        password=make_password(PASSWORD)
+    )
+    author_ids = list(
+        Post.objects.values_list("author", flat=True).distinct()
+    )
+    for user in users:
+        others = [pk for pk in author_ids if pk != user.pk]
+        for author_id in rng.sample(
+            others, min(FOLLOWS_PER_USER, len(others))
+        ):
+            Follow.objects.get_or_create(user=user, author_id=author_id)
+    return [user.username for user in users]
+
+
+def run_load(base_url, clients, duration, mix, seed=0, think=0, timeout=10):
+    targets = collect_targets()
+    usernames = prepare_users(clients, seed)
+    if not usernames:
+        raise CommandError("Нет пользователей для нагрузки")
+    results = Results()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=LoadClient(
+                base_url, targets, results, random.Random(seed + n),
+                usernames[n % len(usernames)], timeout,
+            ).run,
+            args=(mix, deadline, think),
+        )
+        for n in range(clients)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.report(time.monotonic() - started)
+
+
+class Command(BaseCommand):
+    help = (
+        "Поднимает yatube.wsgi.application в многопоточном сервере "
+        "на отдельной базе и нагружает его параллельными клиентами"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=10)
+        parser.add_argument(
+            "--duration", type=float, default=10.0,
+            help="Длительность нагрузки, секунды",
+        )
+        parser.add_argument(
+            "--mix", default=DEFAULT_MIX,
+            help=f"Веса действий, по умолчанию {DEFAULT_MIX}",
+        )
+        parser.add_argument(
+            "--think", type=float, default=0.0,
+            help="Средняя пауза клиента между запросами, секунды",
+        )
+        parser.add_argument("--timeout", type=float, default=10.0)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Куда записать JSON")
+
+    def handle(self, *args, clients, duration, mix, think, timeout, posts,
+               seed, output, **options):
+        mix = parse_mix(mix)
+        if clients < 1:
+            raise CommandError("--clients должен быть положительным")
+        temp_dir = tempfile.mkdtemp()
+        test_settings = connection.settings_dict["TEST"]
+        old_name = connection.settings_dict["NAME"]
+        old_test_name = test_settings.get("NAME")
+        if connection.vendor == "sqlite":
+            # Потокам сервера нужна общая база в файле, а не в памяти
+            test_settings["NAME"] = os.path.join(temp_dir, "db.sqlite3")
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        server = None
+        try:
+            with override_settings(
+                MEDIA_ROOT=os.path.join(temp_dir, "media"),
+                CACHES={"default": {
+                    "BACKEND":
+                        "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "loadtest",
+                }},
+            ):
+                seed_dataset(posts=posts, seed=seed)
+                server = ThreadedWSGIServer(
+                    ("127.0.0.1", 0), QuietHandler,
+                    allow_reuse_address=False,
+                )
+                # Медиа отдаёт сама обёртка, как в LiveServerTestCase
+                server.set_app(MediaFilesApp(application))
+                threading.Thread(
+                    target=server.serve_forever, daemon=True
+                ).start()
+                base_url = f"http://127.0.0.1:{server.server_port}"
+                self.stderr.write(
+                    f"{base_url}: {clients} клиентов, {duration:g} с"
+                )
+                report = run_load(
+                    base_url, clients, duration, mix, seed, think, timeout
+                )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.stdout.write(
+            f"{'route':<16}{'req':>7}{'rps':>9}{'p50':>9}{'p95':>9}"
+            f"{'p99':>9}{'errors':>9}"
+        )
+        for route, stats in report["routes"].items():
+            self.stdout.write(
+                f"{route:<16}{stats['requests']:>7}{stats['rps']:>9.1f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+                f"{stats['p99_ms']:>9.1f}{stats['error_rate']:>9.1%}"
+            )
+        self.stdout.write(
+            f"Всего {report['requests']} запросов, {report['rps']} в "
+            f"секунду, ошибок: {report['errors']}"
+        )
+        report["meta"] = {
+            "clients": clients, "duration": duration, "mix": mix,
+            "think": think, "posts": posts, "seed": seed,
+        }
+        if output:
+            with open(output, "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
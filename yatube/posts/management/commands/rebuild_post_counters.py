@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает количество постов групп и авторов "
+        "и количество комментариев постов"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            groups, authors, posts = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересчитано групп: {groups}, авторов: {authors}, "
+            f"постов с комментариями: {posts}"
+        ))
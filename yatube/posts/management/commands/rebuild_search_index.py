@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.search import is_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс постов (SQLite FTS5)"
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError("Полнотекстовый индекс есть только в SQLite")
+        with transaction.atomic():
+            total = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Проиндексировано постов: {total}"
+        ))
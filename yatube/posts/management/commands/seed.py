@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import BATCH_SIZE, CHUNK_SIZE, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими пользователями, группами, постами "
+        "и комментариями; тот же --seed даёт те же данные"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument(
+            "--max-comments", type=int, default=50,
+            help="Предел комментариев к одному посту",
+        )
+        parser.add_argument(
+            "--images", type=float, default=0.0,
+            help="Доля постов с картинкой, от 0 до 1",
+        )
+        parser.add_argument(
+            "--image-pool", type=int, default=100,
+            help="Сколько разных картинок создать для постов",
+        )
+        parser.add_argument(
+            "--zipf", type=float, default=1.1,
+            help="Перекос популярности авторов и групп (закон Ципфа)",
+        )
+        parser.add_argument(
+            "--days", type=float, default=365,
+            help="За сколько дней распределить посты",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Процессов для генерации строк",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE,
+            help="Постов в одной порции генерации и транзакции",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--prefix", default="user",
+            help="Префикс имён пользователей и slug групп",
+        )
+
+    def handle(self, *args, users, groups, posts, max_comments, images,
+               image_pool, zipf, days, seed, workers, chunk_size,
+               batch_size, prefix, **options):
+        if users < 1 or posts < 0 or groups < 0:
+            raise CommandError("Нужен хотя бы один пользователь")
+        if not 0 <= images <= 1:
+            raise CommandError("--images — доля от 0 до 1")
+        if chunk_size < 1 or batch_size < 1:
+            raise CommandError("Размеры порций должны быть положительными")
+        started = time.monotonic()
+
+        def progress(totals):
+            rows = totals["posts"] + totals["comments"]
+            speed = rows / max(time.monotonic() - started, 1e-6)
+            self.stderr.write(
+                f"Постов: {totals['posts']}, комментариев: "
+                f"{totals['comments']}, {speed:.0f} строк в секунду"
+            )
+
+        try:
+            totals = seed_dataset(
+                posts=posts, seed=seed, users=users, groups=groups,
+                max_comments=max_comments, images=images,
+                image_pool=image_pool, zipf=zipf, days=days,
+                workers=workers, chunk_size=chunk_size,
+                batch_size=batch_size, prefix=prefix, progress=progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = time.monotonic() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Пользователей: {totals['users']}, групп: {totals['groups']}, "
+            f"постов: {totals['posts']}, комментариев: "
+            f"{totals['comments']} за {elapsed:.1f} с "
+            f"({rows / max(elapsed, 1e-6):.0f} строк в секунду)"
+        ))
@@ -0,0 +1,70 @@
+import multiprocessing
+import time
+from collections import Counter
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.cache import SITE_SCOPE, bump_generations
+from posts.models import Post
+from posts.thumbnails import warm_thumbnail
+
+
+def image_items(batch_size):
+    """Пары (id, картинка) постов без миниатюры порциями по первичному
+    ключу: список всех картинок в памяти не держим."""
+    posts = Post.objects.exclude(image="").filter(thumbnail="").order_by("pk")
+    last = 0
+    while True:
+        batch = list(
+            posts.filter(pk__gt=last).values_list("pk", "image")[:batch_size]
+        )
+        if not batch:
+            return
+        yield from batch
+        last = batch[-1][0]
+
+
+def init_worker():
+    # При запуске через spawn дочерний процесс настраивает Django заново
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Создаёт недостающие миниатюры постов в несколько процессов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help="Число процессов (1 — без пула)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50,
+            help="Сколько картинок отдавать процессу за раз",
+        )
+
+    def handle(self, *args, processes, chunk_size, **options):
+        items = image_items(chunk_size * 10)
+        started = time.monotonic()
+        if processes > 1:
+            # Соединения с базой нельзя делить между процессами
+            connections.close_all()
+            with multiprocessing.Pool(processes, init_worker) as pool:
+                results = Counter(
+                    pool.imap_unordered(warm_thumbnail, items, chunk_size)
+                )
+        else:
+            results = Counter(map(warm_thumbnail, items))
+        if results[True]:
+            # Карточки без картинки закешированы во всех лентах сразу
+            bump_generations((SITE_SCOPE,))
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Миниатюр: {results[True]}, ошибок: {results[False]}, "
+            f"за {elapsed:.1f} с"
+        ))
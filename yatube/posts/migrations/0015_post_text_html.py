@@ -0,0 +1,56 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:00
+
+from django.db import migrations, models
+from django.utils.html import escape
+from django.utils.text import Truncator, normalize_newlines
+
+BATCH_SIZE = 500
+# Копия posts.text на момент миграции: код приложения и настройки
+# могут измениться, а миграция должна давать тот же результат
+PREVIEW_LENGTH = 300
+
+
+def render_text(text):
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
+
+
+def text_fields(text):
+    html = render_text(text)
+    if len(text) <= PREVIEW_LENGTH:
+        return html, html
+    return html, render_text(Truncator(text).chars(PREVIEW_LENGTH))
+
+
+def fill_text_html(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('pk', 'text').order_by('pk')
+    last = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            return
+        for post in batch:
+            post.text_html, post.preview_html = text_fields(post.text)
+        Post.objects.bulk_update(batch, ['text_html', 'preview_html'])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='preview_html',
+            field=models.TextField(default='', editable=False, verbose_name='Начало текста в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_text_html, migrations.RunPython.noop),
+    ]
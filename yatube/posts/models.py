@@ -3,17 +3,47 @@ from django.db import models
 
 
 User = get_user_model()
+# Поле не загружалось из базы (отложено через only/defer)
+NOT_LOADED = object()
 
 
 class Group (models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Количество постов",
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        # Лентам хватает короткой версии текста
+        return self.select_related("author", "group").defer(
+            "text", "text_html"
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .cache import bump_generations, post_scopes
+        from .counters import count_new_posts
+        from .text import fill_text_fields
+
+        objs = list(objs)
+        for post in objs:
+            fill_text_fields(post)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        count_new_posts(objs)
+        bump_generations(set().union(*(
+            post_scopes(post.author_id, (post.group_id,)) for post in objs
+        )))
+        return objs
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Текст поста")
@@ -25,6 +55,7 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
+        db_index=False,
     )
 
     def __str__(self):
@@ -33,7 +64,8 @@ class Post(models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name="posts"
+        related_name="posts",
+        db_index=False,
     )
 
     image = models.ImageField(
@@ -41,15 +73,109 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False
+    )
+    thumbnail = models.CharField(
+        'Миниатюра', max_length=255, blank=True, editable=False
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        'Ширина миниатюры', null=True, blank=True, editable=False
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        'Высота миниатюры', null=True, blank=True, editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0, editable=False
+    )
+    text_html = models.TextField('Текст в HTML', default='', editable=False)
+    preview_html = models.TextField(
+        'Начало текста в HTML', default='', editable=False
+    )
+    # Меняется при каждом изменении полей карточки поста в ленте
+    version = models.PositiveIntegerField(
+        'Версия', default=0, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'), name='posts_post_feed_idx'
+            ),
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='posts_post_group_feed_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='posts_post_author_feed_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    def image_changed(self):
+        if "image" in self.get_deferred_fields():
+            return False
+        return self.image != getattr(self, "_loaded_image", None)
+
+    def edit_fields(self, fields):
+        """update_fields для сохранения правки fields: с производными
+        полями, но без счётчика комментариев и миниатюры — их меняют
+        UPDATE с F() в обход экземпляра."""
+        fields = [*fields, 'text_html', 'preview_html', 'version']
+        if self.image_changed():
+            # Миниатюру старой картинки сбрасывает сигнал pre_save
+            fields += [
+                'image_width', 'image_height',
+                'thumbnail', 'thumbnail_width', 'thumbnail_height',
+            ]
+        return fields
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем группу из базы, чтобы при сохранении
+        # перенести пост в счётчике новой группы
+        instance._loaded_group_id = instance.__dict__.get(
+            "group_id", NOT_LOADED
+        )
+        instance._loaded_image = instance.__dict__.get("image")
+        return instance
+
+
+class AuthorCounter(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="post_counter",
+        verbose_name="Автор",
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Количество постов",
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Количество подписчиков",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = "Счётчик постов автора"
+        verbose_name_plural = "Счётчики постов авторов"
+
+    def __str__(self):
+        return f"{self.author}: {self.posts_count}"
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -57,6 +183,7 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Пост с комментарием',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
@@ -70,8 +197,75 @@ class Comment(models.Model):
     )
 
     class Meta:
+        ordering = ('-created',)
         verbose_name = 'Коммент'
         verbose_name_plural = 'Комменты'
+        indexes = (
+            models.Index(
+                fields=('post', 'created'), name='posts_comment_post_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="follower",
+        verbose_name="Подписчик",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="following",
+        verbose_name="Автор",
+    )
+
+    class Meta:
+        verbose_name = "Подписка"
+        verbose_name_plural = "Подписки"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "author"), name="posts_follow_unique"
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.user} -> {self.author}"
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, разложенный при публикации."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Читатель",
+        db_index=False,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Пост",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        verbose_name = "Запись ленты подписок"
+        verbose_name_plural = "Записи лент подписок"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "post"), name="posts_timeline_unique"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("user", "pub_date", "post"),
+                name="posts_timeline_user_idx",
+            ),
+        )
@@ -0,0 +1,155 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .models import Post
+
+FTS_TABLE = "posts_post_fts"
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    text,
+    content='posts_post',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+CREATE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+DROP = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+MATCH = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+TOKEN = re.compile(r"\w+")
+
+
+def is_supported(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install_search_index(using=connection, rebuild=False):
+    """Создаёт FTS5-таблицу и триггеры, если их нет.
+
+    SQLite пересоздаёт posts_post при изменении её схемы и теряет
+    триггеры, поэтому вызывается и после каждого migrate.
+    """
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+
+
+def install_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    install_search_index(connections[using])
+
+
+def drop_search_index(using=connection):
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in DROP:
+            cursor.execute(statement)
+
+
+def rebuild_search_index():
+    install_search_index()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def match_expression(query):
+    # Каждое слово — отдельная фраза с поиском по префиксу,
+    # так пользовательский ввод не ломает синтаксис FTS5
+    return " ".join(f'"{token}"*' for token in TOKEN.findall(query))
+
+
+def filter_posts(queryset, query):
+    """Оставляет в выборке посты, подходящие под запрос (без ранжирования)."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_supported():
+        for token in TOKEN.findall(query):
+            queryset = queryset.filter(text__icontains=token)
+        return queryset
+    # RawSQL в pk__in даёт "IN ((SELECT ...))", то есть только первую
+    # строку подзапроса, поэтому условие добавляется через extra()
+    return queryset.extra(
+        where=[f'"posts_post"."id" IN ({MATCH})'], params=[expression]
+    )
+
+
+class SearchResults:
+    """Ранжированная выдача для Paginator: COUNT и страница через FTS5."""
+
+    def __init__(self, query):
+        self.expression = match_expression(query)
+        self.query = query
+
+    def count(self):
+        if not self.expression:
+            return 0
+        if not is_supported():
+            return filter_posts(Post.objects.all(), self.query).count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                (self.expression,),
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not self.expression:
+            return []
+        if not is_supported():
+            return list(filter_posts(Post.objects.feed(), self.query)[page])
+        limit = page.stop - page.start
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{MATCH} ORDER BY rank LIMIT %s OFFSET %s",
+                (self.expression, limit, page.start),
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
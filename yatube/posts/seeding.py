@@ -0,0 +1,233 @@
+"""Детерминированные наборы данных для замеров и нагрузочных тестов.
+
+Строки генерируют дочерние процессы (posts.synthetic), основной
+процесс пишет их в базу пачками INSERT. Одни и те же параметры
+и seed дают тех же пользователей, группы, тексты, даты и картинки.
+"""
+import multiprocessing
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from .cache import SITE_SCOPE, bump_generations
+from .models import AuthorCounter, Comment, Group, Post
+from .synthetic import generate_chunk, init_worker, make_text
+
+User = get_user_model()
+
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 500
+CHUNK_SIZE = 2000
+IMAGE_SIZE = (320, 240)
+POST_FIELDS = (
+    "id", "text", "text_html", "preview_html", "author_id", "group_id",
+    "pub_date", "image", "image_width", "image_height", "comment_count",
+)
+COMMENT_FIELDS = ("post_id", "author_id", "text", "created")
+
+
+def make_image(rng, name):
+    color = tuple(rng.randrange(256) for _ in range(3))
+    buffer = BytesIO()
+    Image.new("RGB", IMAGE_SIZE, color).save(buffer, "PNG")
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def create_users(prefix, count, batch_size):
+    password = make_password(None)
+    names = [f"{prefix}-{n}" for n in range(count)]
+    User.objects.bulk_create(
+        (User(username=name, password=password) for name in names),
+        batch_size=batch_size,
+    )
+    pks = dict(
+        User.objects.filter(username__startswith=f"{prefix}-")
+        .values_list("username", "pk")
+    )
+    return [pks[name] for name in names]
+
+
+def create_groups(prefix, count, rng, batch_size):
+    slugs = [f"{prefix}-{n}" for n in range(count)]
+    Group.objects.bulk_create(
+        (
+            Group(
+                slug=slug,
+                title=make_text(rng, 1, 3).rstrip("."),
+                description=make_text(rng, 5, 15),
+            )
+            for slug in slugs
+        ),
+        batch_size=batch_size,
+    )
+    pks = dict(
+        Group.objects.filter(slug__in=slugs).values_list("slug", "pk")
+    )
+    return [pks[slug] for slug in slugs]
+
+
+def insert_rows(model, fields, rows, batch_size):
+    """INSERT через executemany без создания экземпляров модели.
+
+    rows — кортежи значений fields, уже подготовленных для базы;
+    остальные поля получают значения по умолчанию. Сигналы
+    и PostQuerySet.bulk_create не вызываются.
+    """
+    opts = model._meta
+    named = [opts.get_field(name) for name in fields]
+    rest = [
+        field for field in opts.concrete_fields
+        if field not in named and not field.primary_key
+    ]
+    defaults = tuple(
+        field.get_db_prep_save(field.get_default(), connection)
+        for field in rest
+    )
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in named + rest)
+    placeholders = ", ".join(["%s"] * (len(named) + len(rest)))
+    sql = (
+        f"INSERT INTO {quote(opts.db_table)} ({columns}) "
+        f"VALUES ({placeholders})"
+    )
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row + defaults for row in islice(rows, batch_size)]
+            if not batch:
+                return
+            cursor.executemany(sql, batch)
+
+
+def date_value(seconds):
+    return connection.ops.adapt_datetimefield_value(
+        START + timedelta(seconds=seconds)
+    )
+
+
+def post_rows(rows, first_pk, ids):
+    for (n, text, text_html, preview_html, author, group, seconds, image,
+         comment_count) in rows:
+        if image is None:
+            image, width, height = "", None, None
+        else:
+            image, (width, height) = ids["images"][image], IMAGE_SIZE
+        yield (
+            first_pk + n, text, text_html, preview_html,
+            ids["authors"][author],
+            None if group is None else ids["groups"][group],
+            date_value(seconds), image, width, height, comment_count,
+        )
+
+
+def comment_rows(rows, first_pk, ids):
+    for n, author, text, seconds in rows:
+        yield first_pk + n, ids["authors"][author], text, date_value(seconds)
+
+
+def save_counters(author_counts, group_counts, ids):
+    """Счётчики новых авторов и групп по числам, известным при
+    генерации, без пересчёта по всей базе."""
+    AuthorCounter.objects.bulk_create(
+        (
+            AuthorCounter(author_id=ids["authors"][author], posts_count=total)
+            for author, total in author_counts.items()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    groups = [
+        Group(pk=ids["groups"][group], posts_count=total)
+        for group, total in group_counts.items()
+        if group is not None
+    ]
+    Group.objects.bulk_update(groups, ["posts_count"], batch_size=BATCH_SIZE)
+
+
+@contextmanager
+def generated(config, tasks, workers):
+    """Порции строк по порядку tasks; workers > 1 — в отдельных
+    процессах."""
+    if workers <= 1:
+        init_worker(config)
+        yield map(generate_chunk, tasks)
+        return
+    with multiprocessing.Pool(
+        workers, initializer=init_worker, initargs=(config,)
+    ) as pool:
+        yield pool.imap(generate_chunk, tasks)
+
+
+def seed_dataset(posts=2000, seed=42, users=50, groups=10, max_comments=20,
+                 images=0.1, image_pool=100, zipf=1.1, days=365, workers=1,
+                 chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, prefix="seed",
+                 progress=None):
+    """Создаёт пользователей и группы <prefix>-<n> и posts постов.
+
+    Популярность авторов и групп подчиняется закону Ципфа с
+    показателем zipf, доля images постов получает одну из image_pool
+    картинок. progress(totals) вызывается после каждой порции.
+    """
+    if User.objects.filter(username=f"{prefix}-0").exists():
+        raise ValueError(f"Данные с префиксом {prefix} уже есть")
+    rng = random.Random(seed)
+    with transaction.atomic():
+        author_ids = create_users(prefix, users, batch_size)
+        group_ids = create_groups(prefix, groups, rng, batch_size)
+    image_names = [
+        make_image(rng, f"posts/{prefix}-{seed}-{n}.png")
+        for n in range(image_pool if images else 0)
+    ]
+    ids = {"authors": author_ids, "groups": group_ids, "images": image_names}
+    first_pk = (Post.objects.aggregate(Max("pk"))["pk__max"] or 0) + 1
+    config = {
+        "seed": seed,
+        "users": users,
+        "groups": groups,
+        "zipf": zipf,
+        "images": images,
+        "image_pool": len(image_names),
+        "max_comments": max_comments,
+        "preview_length": settings.POST_PREVIEW_LENGTH,
+        "step": days * 24 * 3600 / max(posts, 1),
+    }
+    tasks = [
+        (chunk, first, min(chunk_size, posts - first))
+        for chunk, first in enumerate(range(0, posts, chunk_size))
+    ]
+    totals = {"users": users, "groups": groups, "posts": 0, "comments": 0}
+    author_counts, group_counts = Counter(), Counter()
+    with generated(config, tasks, workers) as chunks:
+        for new_posts, new_comments in chunks:
+            with transaction.atomic():
+                insert_rows(
+                    Post, POST_FIELDS,
+                    post_rows(new_posts, first_pk, ids), batch_size,
+                )
+                insert_rows(
+                    Comment, COMMENT_FIELDS,
+                    comment_rows(new_comments, first_pk, ids), batch_size,
+                )
+            author_counts.update(row[4] for row in new_posts)
+            group_counts.update(row[5] for row in new_posts)
+            totals["posts"] += len(new_posts)
+            totals["comments"] += len(new_comments)
+            if progress:
+                progress(totals)
+    with transaction.atomic():
+        save_counters(author_counts, group_counts, ids)
+    # Поисковый индекс заполнили триггеры, кеши лент сбрасываем разом
+    bump_generations((SITE_SCOPE,))
+    return totals
@@ -0,0 +1,118 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import SITE_SCOPE, bump_generations, feed_scope, post_scopes
+from .counters import (change_author_count, change_comment_count,
+                       change_follower_count, change_group_count)
+from .models import NOT_LOADED, Comment, Follow, Group, Post
+from .text import fill_text_fields
+from .thumbnails import schedule_thumbnail
+from .timeline import backfill, fan_out, remove_author
+
+
+@receiver(pre_save, sender=Post)
+def bump_version(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        # Счётчики и пул миниатюр тоже увеличивают версию в базе
+        instance.version = F("version") + 1
+
+
+@receiver(pre_save, sender=Post)
+def render_post_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        fill_text_fields(instance)
+
+
+@receiver(pre_save, sender=Post)
+def fill_image_fields(sender, instance, raw=False, **kwargs):
+    if raw or not instance.image_changed():
+        return
+    # Новая картинка: старая миниатюра к ней не подходит,
+    # её создаст фоновый пул после сохранения
+    instance.thumbnail = ""
+    instance.thumbnail_width = instance.thumbnail_height = None
+    if instance.image:
+        instance.image_width = instance.image.width
+        instance.image_height = instance.image.height
+    else:
+        instance.image_width = instance.image_height = None
+
+
+@receiver(post_save, sender=Post)
+def update_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_group_id = getattr(instance, "_loaded_group_id", NOT_LOADED)
+    group_ids = {instance.group_id, loaded_group_id} - {NOT_LOADED}
+    bump_generations(post_scopes(instance.author_id, group_ids, instance.pk))
+    if instance.image and instance.image_changed():
+        schedule_thumbnail(instance)
+        instance._loaded_image = instance.image.name
+    if created:
+        change_group_count(instance.group_id, 1)
+        change_author_count(instance.author_id, 1)
+        fan_out(instance)
+    elif loaded_group_id is NOT_LOADED:
+        # Прежняя группа неизвестна: перенос в счётчиках не считаем
+        return
+    elif loaded_group_id != instance.group_id:
+        change_group_count(loaded_group_id, -1)
+        change_group_count(instance.group_id, 1)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def update_deleted_post(sender, instance, **kwargs):
+    bump_generations(
+        post_scopes(instance.author_id, (instance.group_id,), instance.pk)
+    )
+    change_group_count(instance.group_id, -1)
+    change_author_count(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def update_group(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_generations((SITE_SCOPE,))
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    change_comment_count(instance.post_id, 1)
+    invalidate_comment_feeds(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+    invalidate_comment_feeds(instance.post_id)
+
+
+def invalidate_comment_feeds(post_id):
+    # Число комментариев выводится в карточке поста во всех его лентах
+    post = Post.objects.filter(pk=post_id).values("author", "group").first()
+    if post is not None:
+        bump_generations(
+            post_scopes(post["author"], (post["group"],), post_id)
+        )
+
+
+@receiver(post_save, sender=Follow)
+def add_follow(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    change_follower_count(instance.author_id, 1)
+    backfill(instance.user_id, instance.author_id)
+    # Кнопка подписки на странице профиля
+    bump_generations((feed_scope("author", instance.author_id),))
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow(sender, instance, **kwargs):
+    change_follower_count(instance.author_id, -1)
+    remove_author(instance.user_id, instance.author_id)
+    bump_generations((feed_scope("author", instance.author_id),))
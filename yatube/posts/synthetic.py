@@ -0,0 +1,86 @@
+"""Генерация синтетических строк для seed без обращений к базе.
+
+Функции выполняются в дочерних процессах, поэтому модуль не
+импортирует модели: на входе номера строк, на выходе кортежи.
+Каждая порция постов получает свой Random от (seed, номер порции),
+так что результат не зависит от числа процессов.
+"""
+import random
+from bisect import bisect
+from itertools import accumulate
+
+from faker.providers.lorem.ru_RU import Provider as RussianLorem
+
+from .text import text_fields
+
+VOCABULARY = RussianLorem.word_list
+# Число комментариев к посту — распределение Парето: у большинства
+# постов их нет или мало, у немногих — сотни
+COMMENT_ALPHA = 1.2
+COMMENT_DELAY = 3600
+NO_GROUP = 0.2
+
+_config = None
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа: первый элемент популярнее всех."""
+    return list(
+        accumulate(1 / rank ** exponent for rank in range(1, count + 1))
+    )
+
+
+def pick(rng, cum_weights):
+    return bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+def make_text(rng, low, high):
+    words = rng.choices(VOCABULARY, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def init_worker(config):
+    global _config
+    _config = dict(
+        config,
+        author_weights=zipf_weights(config["users"], config["zipf"]),
+        group_weights=zipf_weights(config["groups"], config["zipf"]),
+    )
+
+
+def generate_chunk(task):
+    """(номер порции, первый пост, число постов) -> посты и комментарии.
+
+    Пост: (номер, текст, HTML текста, HTML начала текста, номер
+    автора, номер группы или None, секунды от начала, номер картинки
+    или None, число комментариев).
+    Комментарий: (номер поста, номер автора, текст, секунды от начала).
+    """
+    chunk, first, count = task
+    config = _config
+    rng = random.Random(f"{config['seed']}:{chunk}")
+    step = config["step"]
+    posts, comments = [], []
+    for n in range(first, first + count):
+        seconds = (n + rng.random()) * step
+        group = None
+        if config["groups"] and rng.random() >= NO_GROUP:
+            group = pick(rng, config["group_weights"])
+        image = None
+        if config["image_pool"] and rng.random() < config["images"]:
+            image = rng.randrange(config["image_pool"])
+        text = make_text(rng, 8, 80)
+        author = pick(rng, config["author_weights"])
+        fan_out = min(
+            config["max_comments"], int(rng.paretovariate(COMMENT_ALPHA)) - 1
+        )
+        posts.append((
+            n, text, *text_fields(text, config["preview_length"]), author,
+            group, seconds, image, fan_out,
+        ))
+        for _ in range(fan_out):
+            comments.append((
+                n, pick(rng, config["author_weights"]), make_text(rng, 3, 25),
+                seconds + 1 + rng.expovariate(1 / COMMENT_DELAY),
+            ))
+    return posts, comments
@@ -0,0 +1,66 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts.cache import (feed_scope, fragment_key, get_cards, get_fragment,
+                         set_cards, set_fragment)
+from posts.thumbnails import attach_thumbnails
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, kind, pk):
+        self.nodelist = nodelist
+        self.kind = kind
+        self.pk = pk
+
+    def render(self, context):
+        pk = self.pk.resolve(context) if self.pk is not None else None
+        scope = feed_scope(self.kind.resolve(context), pk)
+        key = fragment_key(scope, context["request"])
+        fragment = get_fragment(key)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            set_fragment(key, fragment)
+        return fragment
+
+
+@register.tag
+def feedcache(parser, token):
+    """Кеширует фрагмент ленты до следующего изменения её постов.
+
+    {% feedcache "group" group.pk %} ... {% endfeedcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) not in (2, 3):
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает ленту и необязательный id"
+        )
+    nodelist = parser.parse(("endfeedcache",))
+    parser.delete_first_token()
+    kind = parser.compile_filter(bits[1])
+    pk = parser.compile_filter(bits[2]) if len(bits) == 3 else None
+    return FeedCacheNode(nodelist, kind, pk)
+
+
+@register.filter
+def with_cards(posts):
+    """Проставляет постам готовую карточку post.card.
+
+    Карточка одинакова во всех лентах, поэтому рендерятся и ищут
+    миниатюры только посты, которых нет в кеше.
+    """
+    posts = list(posts)
+    cards, site = get_cards(posts)
+    missing = attach_thumbnails(
+        post for post in posts if post.pk not in cards
+    )
+    for post in missing:
+        cards[post.pk] = render_to_string(
+            "posts/includes/article.html", {"post": post}
+        )
+    set_cards(missing, cards, site)
+    for post in posts:
+        post.card = mark_safe(cards[post.pk])
+    return posts
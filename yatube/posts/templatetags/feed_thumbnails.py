@@ -0,0 +1,15 @@
+from django import template
+
+from posts.thumbnails import attach_thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def with_thumbnails(posts):
+    return attach_thumbnails(posts)
+
+
+@register.filter
+def post_thumbnail(post):
+    return attach_thumbnails([post])[0].thumb
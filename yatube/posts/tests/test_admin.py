@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.superuser)
+        self.url = reverse("admin:posts_post_changelist")
+
+    def create_posts(self, total):
+        start = Post.objects.count()
+        for i in range(start, start + total):
+            author = User.objects.create_user(username=f"author{i}")
+            group = Group.objects.create(title=f"Группа {i}", slug=f"g{i}")
+            Post.objects.create(author=author, group=group, text=f"Пост {i}")
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        """Число запросов списка постов не зависит от числа строк."""
+        self.create_posts(2)
+        cache.clear()
+        few = self.count_queries()
+        self.create_posts(6)
+        cache.clear()
+        self.assertEqual(self.count_queries(), few)
+
+    def test_count_is_cached(self):
+        """COUNT(*) списка берётся из кэша при повторном открытии."""
+        self.create_posts(3)
+        first = self.count_queries()
+        self.assertEqual(self.count_queries(), first - 1)
+
+    def test_group_admin_shows_posts_count(self):
+        """В списке групп выводится счётчик постов."""
+        self.create_posts(1)
+        response = self.client.get(reverse("admin:posts_group_changelist"))
+        self.assertContains(response, "column-posts_count")
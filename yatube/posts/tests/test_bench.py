@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts.benchmarking import percentile
+from posts.management.commands.bench import (COMPONENTS, compare,
+                                             run_benchmarks, summarize)
+from posts.models import Comment, Group, Post, User
+from posts.seeding import seed_dataset
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class StatsTest(TestCase):
+    def test_percentile(self):
+        """Перцентили считаются с интерполяцией между соседями."""
+        samples = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(percentile(samples, 0), 1.0)
+        self.assertEqual(percentile(samples, 50), 2.5)
+        self.assertEqual(percentile(samples, 100), 4.0)
+        stats = summarize([3.0, 1.0, 2.0])
+        self.assertEqual(stats["median_ms"], 2.0)
+        self.assertEqual(stats["min_ms"], 1.0)
+        self.assertEqual(stats["runs"], 3)
+
+    def test_compare_flags_regressions(self):
+        """Рост медианы выше порога считается регрессией."""
+        baseline = {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}
+        results = {
+            "a": {"median_ms": 10.5},
+            "b": {"median_ms": 12.0},
+            "c": {"median_ms": 1.0},
+        }
+        lines, regressions = compare(results, baseline, 0.1)
+        self.assertEqual(regressions, ["b"])
+        self.assertEqual(len(lines), 3)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class BenchTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_is_deterministic(self):
+        """Один seed даёт одинаковые тексты постов."""
+        seeded = seed_dataset(posts=40, seed=7, users=5, groups=2)
+        self.assertEqual(seeded["posts"], 40)
+        self.assertEqual(seeded["comments"], Comment.objects.count())
+        texts = list(Post.objects.order_by("pub_date").values_list(
+            "text", flat=True
+        ))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seed_dataset(posts=40, seed=7, users=5, groups=2)
+        self.assertEqual(
+            list(Post.objects.order_by("pub_date").values_list(
+                "text", flat=True
+            )),
+            texts,
+        )
+
+    def test_run_all_components(self):
+        """Каждый компонент замеряется заданное число раз."""
+        seed_dataset(posts=60, seed=1, users=5, groups=2)
+        results = run_benchmarks(list(COMPONENTS), warmup=1, repeat=3)
+        self.assertEqual(set(results), set(COMPONENTS))
+        for stats in results.values():
+            self.assertEqual(stats["runs"], 3)
+            self.assertLessEqual(stats["min_ms"], stats["p90_ms"])
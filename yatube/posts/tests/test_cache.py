@@ -0,0 +1,283 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import cache_stats
+from posts.forms import PostForm
+from posts.models import Group, Post, User
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="cached")
+        cls.group = Group.objects.create(
+            title="Группа",
+            slug="cached",
+            description="Описание",
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other",
+            description="Описание",
+        )
+        cls.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_progect", kwargs={"slug": cls.group.slug}),
+            reverse("posts:profile", kwargs={"username": cls.user.username}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            text="Старый пост",
+            group=self.group,
+        )
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_second_request_is_cached(self):
+        """Повторный запрос ленты берёт посты из кеша"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.authorized_client.get(url)
+                stats = cache_stats()["fragment"]
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(url)
+                self.assertContains(response, "Старый пост")
+                self.assertEqual(
+                    cache_stats()["fragment"]["hits"], stats["hits"] + 1
+                )
+                self.assertFalse(any(
+                    'FROM "posts_post" INNER JOIN' in query["sql"]
+                    for query in queries
+                ))
+
+    def test_anonymous_page_is_cached(self):
+        """Анонимный запрос берёт всю страницу из кеша без базы"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                stats = cache_stats()["page"]
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertContains(response, "Старый пост")
+                self.assertEqual(
+                    cache_stats()["page"]["hits"], stats["hits"] + 1
+                )
+
+    def test_anonymous_page_ignores_extra_params(self):
+        """Посторонние параметры запроса не создают новых копий"""
+        url = self.urls[0]
+        self.guest_client.get(url)
+        stats = cache_stats()["page"]
+        with self.assertNumQueries(0):
+            self.guest_client.get(url, {"utm_source": "mail", "x": "1"})
+        self.assertEqual(cache_stats()["page"]["hits"], stats["hits"] + 1)
+        response = self.guest_client.get(url, {"page": "2"})
+        self.assertEqual(cache_stats()["page"]["misses"], stats["misses"] + 1)
+        self.assertEqual(response.status_code, 200)
+
+    def test_authorized_page_is_not_cached(self):
+        """Авторизованный пользователь видит свою шапку"""
+        url = self.urls[0]
+        self.guest_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, self.user.username)
+        self.assertContains(response, "Выйти")
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден во всех своих лентах"""
+        for url in self.urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=self.user, text="Новый пост", group=self.group
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), "Новый пост")
+
+    def test_edit_moves_post_between_group_feeds(self):
+        """Перенос поста в другую группу обновляет обе ленты групп"""
+        old_url = self.urls[1]
+        new_url = reverse(
+            "posts:group_progect", kwargs={"slug": self.other_group.slug}
+        )
+        self.guest_client.get(old_url)
+        self.guest_client.get(new_url)
+        self.authorized_client.post(
+            reverse("posts:post_edit", kwargs={"post_id": self.post.id}),
+            {"text": "Перенесённый пост", "group": self.other_group.id},
+        )
+        self.assertNotContains(
+            self.guest_client.get(old_url), "Перенесённый пост"
+        )
+        self.assertContains(
+            self.guest_client.get(new_url), "Перенесённый пост"
+        )
+
+    def test_delete_invalidates_feeds(self):
+        """Удалённый пост пропадает из лент"""
+        for url in self.urls:
+            self.guest_client.get(url)
+        self.post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotContains(
+                    self.guest_client.get(url), "Старый пост"
+                )
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="etag")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа",
+            slug="etag",
+            description="Описание",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text="Пост", group=self.group
+        )
+        self.client = Client()
+        self.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_progect", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user.username}),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+        )
+
+    def test_not_modified_without_queries(self):
+        """Повторный запрос с валидатором получает 304 без запросов к базе"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                response = self.client.get(url)
+                self.assertTrue(response.has_header("Last-Modified"))
+                with self.assertNumQueries(0):
+                    not_modified = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(not_modified.status_code, 304)
+                not_modified = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(not_modified.status_code, 304)
+
+    def test_changes_reset_validators(self):
+        """Новый комментарий или пост меняют ETag страниц"""
+        etags = {}
+        for url in self.urls:
+            self.client.get(url)
+            etags[url] = self.client.get(url)["ETag"]
+        self.post.comments.create(author=self.reader, text="Коммент")
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_validators_depend_on_user(self):
+        """Авторизованный пользователь не получает 304 на чужой ETag"""
+        url = self.urls[2]
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        self.client.force_login(self.reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.client.get(
+            reverse("posts:profile_follow", args=[self.user.username])
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Отписаться")
+
+
+class CardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="card")
+        cls.group = Group.objects.create(
+            title="Группа",
+            slug="card",
+            description="Описание",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text="Карточка", group=self.group
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_cards_are_shared_between_feeds(self):
+        """Карточка, отрисованная на главной, берётся из кеша в группе"""
+        self.client.get(reverse("posts:index"))
+        hits = cache_stats()["card"]["hits"]
+        response = self.client.get(
+            reverse("posts:group_progect", kwargs={"slug": self.group.slug})
+        )
+        self.assertContains(response, "Карточка")
+        self.assertEqual(cache_stats()["card"]["hits"], hits + 1)
+
+    def test_changes_bump_version(self):
+        """Правка поста и новый комментарий меняют карточку"""
+        url = reverse("posts:index")
+        self.client.get(url)
+        version = self.post.version
+        self.post.text = "Новый текст"
+        self.post.save()
+        self.assertContains(self.client.get(url), "Новый текст")
+        self.post.comments.create(author=self.user, text="Коммент")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, version + 2)
+        self.assertContains(self.client.get(url), "Комментариев: 1")
+
+    def test_edit_keeps_denormalized_fields(self):
+        """Правка устаревшего экземпляра не затирает счётчик и миниатюру"""
+        stale = Post.objects.get(pk=self.post.pk)
+        version = stale.version
+        self.post.comments.create(author=self.user, text="Коммент")
+        Post.objects.filter(pk=self.post.pk).update(
+            thumbnail="thumb.jpg", thumbnail_width=4, thumbnail_height=3
+        )
+        stale.text = "Правка"
+        stale.save(update_fields=stale.edit_fields(PostForm.Meta.fields))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, "Правка")
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            (post.thumbnail, post.thumbnail_width, post.thumbnail_height),
+            ("thumb.jpg", 4, 3),
+        )
+        self.assertEqual(post.version, version + 2)
+
+    def test_edit_view_updates_own_fields(self):
+        """post_edit не пишет счётчик комментариев и миниатюру"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse("posts:post_edit", args=[self.post.pk]),
+                {"text": "Правка", "group": self.group.pk},
+            )
+        updates = [
+            query["sql"] for query in queries
+            if query["sql"].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"text" = ', updates[0])
+        self.assertNotIn('"comment_count"', updates[0])
+        self.assertNotIn('"thumbnail"', updates[0])
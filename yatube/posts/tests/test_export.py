@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="leo")
+        cls.staff = User.objects.create_user(username="staff", is_staff=True)
+        cls.group = Group.objects.create(
+            title="Коты", slug="cats", description="Мяу"
+        )
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text="Про котов"
+        )
+        Post.objects.create(author=self.staff, text="Без группы")
+        Comment.objects.create(post=self.post, author=self.staff, text="Ура")
+
+    def export(self, **options):
+        out = StringIO()
+        call_command("export_posts", stdout=out, stderr=StringIO(), **options)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_export_filters(self):
+        """Выгрузка фильтруется по группе, автору и датам."""
+        self.assertEqual(
+            [row["type"] for row in self.export()],
+            ["group", "post", "post", "comment"],
+        )
+        rows = self.export(group="cats", no_comments=True)
+        self.assertEqual(
+            [row.get("text") for row in rows], [None, "Про котов"]
+        )
+        self.assertEqual(
+            [row["author"] for row in self.export(author="staff")],
+            ["staff"],
+        )
+        self.assertEqual(self.export(until="2000-01-01"), [])
+
+    def test_export_imports_back(self):
+        """Выгрузка загружается обратно командой import_posts."""
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command(
+            "export_posts", output=path, fmt="csv", stderr=StringIO()
+        )
+        Post.objects.all().delete()
+        call_command("import_posts", path, stdout=StringIO(),
+                     stderr=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.comment_count, 1)
+
+    def test_export_view_is_staff_only(self):
+        """HTTP-выгрузка доступна только персоналу и отдаётся потоком."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(reverse("posts:export"))
+        self.assertEqual(response.status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(reverse("posts:export"), {"format": "csv"})
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertTrue(content.startswith("type,id,text"))
+        self.assertIn("Про котов", content)
+        response = client.get(reverse("posts:export"), {"since": "вчера"})
+        self.assertEqual(response.status_code, 400)
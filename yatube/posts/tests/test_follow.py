@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yatube.settings import COUNT
+
+from ..models import AuthorCounter, Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.stranger = User.objects.create_user(username="stranger")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.old_post = Post.objects.create(author=self.author, text="Старый")
+
+    def follow(self, user=None):
+        user = user or self.author
+        return self.client.get(
+            reverse("posts:profile_follow", args=[user.username])
+        )
+
+    def feed(self):
+        response = self.client.get(reverse("posts:follow_index"))
+        return list(response.context["page_obj"])
+
+    def test_follow_and_unfollow(self):
+        """Подписка заполняет ленту, отписка её очищает."""
+        self.follow()
+        self.follow()
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(), 1
+        )
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.author).followers_count, 1
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+        self.client.get(
+            reverse("posts:profile_unfollow", args=[self.author.username])
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_cannot_follow_self(self):
+        """На себя подписаться нельзя."""
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        self.follow()
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse("posts:post_create"), {"text": "Новый"})
+        new_post = Post.objects.get(text="Новый")
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_popular_author_is_merged_on_read(self):
+        """Посты популярного автора подмешиваются при чтении ленты."""
+        self.follow()
+        other = User.objects.create_user(username="other")
+        Follow.objects.create(user=self.reader, author=other)
+        new_post = Post.objects.create(author=self.author, text="Новый")
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_popular_timeline_pages_by_cursor(self):
+        """Смешанная лента листается курсором без повторов."""
+        self.follow()
+        posts = [
+            Post.objects.create(author=self.author, text=f"Пост {i}")
+            for i in range(COUNT)
+        ]
+        other = User.objects.create_user(username="other")
+        Follow.objects.create(user=self.reader, author=other)
+        # Автор стал популярным: старые записи ленты остались
+        with override_settings(FOLLOW_FANOUT_LIMIT=0):
+            posts += [
+                Post.objects.create(author=other, text=f"Чужой {i}")
+                for i in range(3)
+            ]
+            expected = sorted(
+                posts + [self.old_post],
+                key=lambda post: (post.pub_date, post.pk),
+                reverse=True,
+            )
+            url = reverse("posts:follow_index")
+            first = self.client.get(url).context["page_obj"]
+            self.assertTrue(first.paginator.is_cursor)
+            second = self.client.get(
+                url, {"after": first.next_cursor}
+            ).context["page_obj"]
+            self.assertEqual(list(first) + list(second), expected)
+            self.assertIsNone(second.next_cursor)
+            back = self.client.get(
+                url, {"before": second.previous_cursor}
+            ).context["page_obj"]
+            self.assertEqual(list(back), list(first))
+
+    def test_timeline_page_queries(self):
+        """Число запросов ленты подписок не зависит от числа постов."""
+        self.follow()
+        # Курсорная лента обходится без COUNT
+        with self.assertNumQueries(4):
+            self.feed()
+        for i in range(5):
+            Post.objects.create(author=self.author, text=f"Пост {i}")
+        with self.assertNumQueries(4):
+            self.feed()
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_popular_authors_read_separately(self):
+        """Посты каждого популярного автора — отдельный диапазон индекса."""
+        self.follow()
+        other = User.objects.create_user(username="other")
+        self.follow(other)
+        with CaptureQueriesContext(connection) as queries:
+            self.feed()
+        seeks = [
+            query["sql"] for query in queries
+            if 'FROM "posts_post"' in query["sql"]
+            and 'WHERE "posts_post"."author_id" = ' in query["sql"]
+        ]
+        self.assertEqual(len(seeks), 2)
+        for sql in seeks:
+            self.assertIn("LIMIT 11", sql)
+            self.assertNotIn(" IN (SELECT", sql)
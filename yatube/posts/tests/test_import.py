@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..cache import feed_scope, get_generations
+from ..models import (AuthorCounter, Comment, Follow, Group, Post,
+                      TimelineEntry)
+from ..search import SearchResults
+
+User = get_user_model()
+
+ROWS = (
+    {"type": "group", "slug": "cats", "title": "Коты", "description": "Мяу"},
+    {
+        "type": "post", "id": 100, "text": "Старый пост про котов",
+        "author": "leo", "group": "cats", "pub_date": "2010-05-01T10:00:00",
+    },
+    {"type": "post", "id": 101, "text": "Второй пост", "author": "leo"},
+    {"type": "post", "text": "Пост в новой группе", "author": "anna",
+     "group": "dogs"},
+    {
+        "type": "comment", "post": 100, "author": "anna", "text": "Ура",
+        "created": "2010-05-02T10:00:00+00:00",
+    },
+)
+
+
+class ImportPostsTest(TestCase):
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_ndjson(self):
+        """Строки загружаются пачками с датами из файла и счётчиками."""
+        User.objects.create_user(username="leo")
+        path = self.write(
+            ".ndjson", "\n".join(json.dumps(row) for row in ROWS)
+        )
+        out = StringIO()
+        call_command(
+            "import_posts", path, batch_size=2, stdout=out, stderr=StringIO()
+        )
+        self.assertIn("постов: 3", out.getvalue())
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.pub_date.year, 2010)
+        self.assertEqual(post.group.title, "Коты")
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(Comment.objects.get().created.day, 2)
+        self.assertEqual(Group.objects.get(slug="dogs").posts_count, 1)
+        self.assertEqual(
+            AuthorCounter.objects.get(author__username="leo").posts_count, 2
+        )
+        self.assertFalse(
+            User.objects.get(username="anna").has_usable_password()
+        )
+        self.assertEqual(SearchResults("котов").count(), 1)
+
+    def test_import_csv(self):
+        """CSV читается с пустыми ячейками как отсутствующими полями."""
+        path = self.write(
+            ".csv",
+            "type,id,text,author,group,pub_date\n"
+            "post,,Первый,leo,,\n"
+            "post,,Второй,leo,cats,2011-01-01T00:00:00\n",
+        )
+        call_command("import_posts", path, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Group.objects.get().posts_count, 1)
+
+    def test_import_keeps_other_posts(self):
+        """Импорт меняет счётчики только затронутых постов."""
+        leo = User.objects.create_user(username="leo")
+        old = Post.objects.create(author=leo, text="Старый")
+        Comment.objects.create(post=old, author=leo, text="Есть")
+        target = Post.objects.create(author=leo, text="Цель")
+        Comment.objects.create(post=target, author=leo, text="Первый")
+        old.refresh_from_db()
+        path = self.write(".ndjson", "\n".join(
+            json.dumps({"type": "comment", "post": target.pk,
+                        "author": "anna", "text": f"Ещё {n}"})
+            for n in range(3)
+        ))
+        call_command(
+            "import_posts", path, batch_size=2, stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        target.refresh_from_db()
+        self.assertEqual(target.comment_count, 4)
+        self.assertEqual(
+            Post.objects.get(pk=old.pk).version, old.version
+        )
+
+    def test_import_fans_out_and_refreshes_feeds(self):
+        """Новые посты попадают в ленты подписчиков, кеш лент сброшен."""
+        leo = User.objects.create_user(username="leo")
+        reader = User.objects.create_user(username="reader")
+        Follow.objects.create(user=reader, author=leo)
+        post = Post.objects.create(author=leo, text="Старый")
+        scopes = (feed_scope("index"), feed_scope("post", post.pk))
+        before = get_generations(*scopes)
+        path = self.write(".ndjson", "\n".join(json.dumps(row) for row in (
+            {"type": "post", "text": "Новый", "author": "leo",
+             "pub_date": "2012-03-04T05:06:07+00:00"},
+            {"type": "comment", "post": post.pk, "author": "anna",
+             "text": "Коммент"},
+        )))
+        call_command(
+            "import_posts", path, stdout=StringIO(), stderr=StringIO()
+        )
+        new = Post.objects.get(text="Новый")
+        self.assertEqual(new.pub_date.year, 2012)
+        self.assertEqual(new.text_html, "Новый")
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=new).exists()
+        )
+        for scope, old, current in zip(
+            scopes, before, get_generations(*scopes)
+        ):
+            with self.subTest(scope=scope):
+                self.assertGreater(current, old)
+        self.assertTrue(Post._meta.get_field("pub_date").auto_now_add)
@@ -0,0 +1,42 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import instrumentation
+from posts.models import Post, User
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="timing")
+        Post.objects.create(author=cls.user, text="Пост")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_header_and_log_line(self):
+        """Ответ содержит Server-Timing, метрики пишутся в лог"""
+        client = Client()
+        with self.assertLogs("core.timing", "INFO") as logs:
+            response = client.get(reverse("posts:index"))
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "cache;desc=", "total;dur="):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["path"], reverse("posts:index"))
+        self.assertGreater(line["queries"], 0)
+        self.assertGreater(line["template_ms"], 0)
+        self.assertGreater(line["cache_misses"], 0)
+        self.assertIsNone(instrumentation.current.get())
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        """Выключенный замер не добавляет заголовок"""
+        response = Client().get(reverse("posts:index"))
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.test import (LiveServerTestCase, RequestFactory, SimpleTestCase,
+                         override_settings)
+
+from posts.benchmarking import MediaFilesApp
+
+from posts.management.commands.loadtest import parse_mix, run_load
+from posts.models import Comment, Post
+from posts.seeding import seed_dataset
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ParseMixTest(SimpleTestCase):
+    def test_parse_mix(self):
+        """Смесь действий разбирается в словарь весов."""
+        self.assertEqual(
+            parse_mix("anon_read=3,comment=1"),
+            {"anon_read": 3.0, "comment": 1.0},
+        )
+        for value in ("delete=1", "anon_read=x", "anon_read=0"):
+            with self.subTest(value=value):
+                with self.assertRaises(CommandError):
+                    parse_mix(value)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaFilesAppTest(SimpleTestCase):
+    def call(self, path):
+        def application(environ, start_response):
+            start_response("200 OK", [])
+            return [b"app"]
+
+        def start_response(status, headers):
+            result["status"] = status
+
+        result = {}
+        environ = RequestFactory().get(path).environ
+        body = b"".join(MediaFilesApp(application)(environ, start_response))
+        return result["status"], body
+
+    def test_serves_media(self):
+        """Обёртка отдаёт файлы медиа, остальное — приложению."""
+        os.makedirs(TEMP_MEDIA_ROOT, exist_ok=True)
+        self.addCleanup(shutil.rmtree, TEMP_MEDIA_ROOT, ignore_errors=True)
+        with open(os.path.join(TEMP_MEDIA_ROOT, "file.txt"), "wb") as file:
+            file.write(b"media")
+        self.assertEqual(self.call("/media/file.txt"), ("200 OK", b"media"))
+        self.assertEqual(self.call("/media/none.txt")[0], "404 Not Found")
+        self.assertEqual(self.call("/"), ("200 OK", b"app"))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class LoadTest(LiveServerTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        seed_dataset(posts=30, seed=3, users=4, groups=2)
+
+    def test_mixed_load(self):
+        """Клиенты читают ленты, входят, пишут посты и комментарии."""
+        posts, comments = Post.objects.count(), Comment.objects.count()
+        report = run_load(
+            self.live_server_url, clients=2, duration=1.5,
+            mix={"anon_read": 1, "auth_read": 1, "comment": 1, "create": 1},
+        )
+        self.assertGreater(report["requests"], 0)
+        # Общая база в памяти у LiveServerTestCase иногда отвечает
+        # «table is locked» (500), но 403 или 404 быть не должно
+        for route, stats in report["routes"].items():
+            with self.subTest(route=route):
+                self.assertLessEqual(
+                    set(stats["statuses"]), {"200", "302", "500"}
+                )
+        self.assertIn("login", report["routes"])
+        self.assertGreater(Post.objects.count(), posts)
+        self.assertGreater(Comment.objects.count(), comments)
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.metrics import REQUEST_LATENCY, REQUEST_QUERIES, Histogram
+from posts.models import Post, User
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="metrics")
+        Post.objects.create(author=cls.user, text="Пост")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_requests_are_recorded_by_url_name(self):
+        """Время ответа и число запросов копятся по имени URL"""
+        latency = REQUEST_LATENCY.count("posts:index")
+        queries = REQUEST_QUERIES.count("posts:index")
+        self.client.get(reverse("posts:index"))
+        self.assertEqual(REQUEST_LATENCY.count("posts:index"), latency + 1)
+        self.assertEqual(REQUEST_QUERIES.count("posts:index"), queries + 1)
+
+    def test_metrics_endpoint(self):
+        """/metrics отдаёт метрики в текстовом формате Prometheus"""
+        self.client.get(reverse("posts:index"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(
+            response["Content-Type"], "text/plain; version=0.0.4"
+        )
+        text = response.content.decode()
+        for line in (
+            "# TYPE yatube_request_duration_seconds histogram",
+            'yatube_request_duration_seconds_count{view="posts:index"}',
+            'yatube_feed_cache_requests_total{layer="page",result="miss"}',
+            'yatube_feed_cache_hit_ratio{layer="page"}',
+            "# TYPE yatube_thumbnail_duration_seconds histogram",
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    def test_metrics_access(self):
+        """/metrics открыт разрешённым адресам и сотрудникам"""
+        url = reverse("metrics")
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR="10.0.0.1").status_code, 403
+        )
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR="10.0.0.1").status_code, 403
+        )
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'yatube_process_info{pid="')
+
+    def test_histogram_buckets(self):
+        """Корзины гистограммы накопительные, значение на границе входит"""
+        histogram = Histogram("test", "Тест", buckets=(1, 2))
+        for value in (0.5, 1, 3):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.samples()), [
+            ('test_bucket{le="1"}', 2),
+            ('test_bucket{le="2"}', 2),
+            ('test_bucket{le="+Inf"}', 3),
+            ("test_sum", 4.5),
+            ("test_count", 3),
+        ])
@@ -1,7 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
-from ..models import Group, Post
+from ..cache import SITE_SCOPE, get_generations
+from ..management.commands.check_query_plans import explain, plan_problems
+from ..models import AuthorCounter, Group, Post
 
 User = get_user_model()
 
@@ -48,3 +53,120 @@ class PostModelTest(TestCase):
                     post._meta.get_field(value).verbose_name,
                     expected
                 )
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="counter")
+        cls.group = Group.objects.create(
+            title="Первая группа",
+            slug="first",
+            description="Описание",
+        )
+        cls.other_group = Group.objects.create(
+            title="Вторая группа",
+            slug="second",
+            description="Описание",
+        )
+
+    def assertCounts(self, group, other_group, author):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.user).posts_count, author
+        )
+
+    def test_create_move_delete(self):
+        """Счётчики следуют за созданием, переносом и удалением поста"""
+        post = Post.objects.create(
+            author=self.user, text="Текст", group=self.group
+        )
+        self.assertCounts(1, 0, 1)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(0, 1, 1)
+        post.group = None
+        post.save()
+        self.assertCounts(0, 0, 1)
+        post.delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_deferred_group_is_not_moved(self):
+        """Пост без загруженной группы не переносится в счётчиках"""
+        post = Post.objects.create(
+            author=self.user, text="Текст", group=self.group
+        )
+        post = Post.objects.only("text").get(pk=post.pk)
+        post.text = "Правка"
+        post.save()
+        self.assertCounts(1, 0, 1)
+
+    def test_bulk_create(self):
+        """bulk_create учитывается в счётчиках"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text="Текст", group=self.group)
+            for _ in range(3)
+        )
+        self.assertCounts(3, 0, 3)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_post_counters восстанавливает счётчики"""
+        Post.objects.create(author=self.user, text="Текст", group=self.group)
+        Group.objects.update(posts_count=7)
+        AuthorCounter.objects.all().delete()
+        call_command("rebuild_post_counters", stdout=StringIO())
+        self.assertCounts(1, 0, 1)
+
+
+class QueryPlanTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицу и не сортируют во временном
+        B-дереве"""
+        call_command("check_query_plans", stdout=StringIO())
+
+    def test_full_scan_is_reported(self):
+        """Полный просмотр таблицы считается ошибкой"""
+        plan = explain(Post.objects.filter(text="Текст").order_by())
+        self.assertTrue(plan_problems(plan))
+
+
+@override_settings(POST_PREVIEW_LENGTH=10)
+class PostTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="text")
+
+    def test_text_html_is_filled_on_save(self):
+        """При сохранении текст переводится в HTML и обрезается превью"""
+        post = Post.objects.create(author=self.user, text="<b>\nдлинный текст")
+        self.assertEqual(post.text_html, "&lt;b&gt;<br>длинный текст")
+        self.assertEqual(post.preview_html, "&lt;b&gt;<br>длинн…")
+        Post.objects.bulk_create([Post(author=self.user, text="a\nb")])
+        self.assertEqual(
+            Post.objects.get(text="a\nb").text_html, "a<br>b"
+        )
+
+    def test_feed_defers_full_text(self):
+        """Лента не читает полный текст постов"""
+        Post.objects.create(author=self.user, text="Текст")
+        query = str(Post.objects.feed().query)
+        self.assertNotIn('"posts_post"."text"', query)
+        self.assertNotIn('"posts_post"."text_html"', query)
+        self.assertIn('"posts_post"."preview_html"', query)
+
+    def test_backfill_command(self):
+        """Команда заполняет HTML у старых постов"""
+        post = Post.objects.create(author=self.user, text="a\nb")
+        Post.objects.update(text_html="", preview_html="")
+        site, = get_generations(SITE_SCOPE)
+        call_command("backfill_post_text", stdout=StringIO())
+        self.assertGreater(get_generations(SITE_SCOPE)[0], site)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, "a<br>b")
+        self.assertEqual(post.preview_html, "a<br>b")
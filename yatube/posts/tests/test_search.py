@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import SearchResults, match_expression
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.often = Post.objects.create(
+            author=self.user, text="Кот и снова кот, кот везде"
+        )
+        self.once = Post.objects.create(
+            author=self.user,
+            text="Длинный пост про собаку, где один раз встречается кот",
+        )
+        Post.objects.create(author=self.user, text="Про собаку")
+
+    def search(self, query):
+        return [post.pk for post in SearchResults(query)[0:10]]
+
+    def test_search_ranks_results(self):
+        """Выдача отсортирована по релевантности."""
+        self.assertEqual(self.search("кот"), [self.often.pk, self.once.pk])
+        self.assertEqual(SearchResults("кот").count(), 2)
+
+    def test_search_by_prefix_and_all_words(self):
+        """Слова ищутся по префиксу и должны встретиться все."""
+        self.assertEqual(self.search("соба кот"), [self.once.pk])
+
+    def test_index_follows_changes(self):
+        """Триггеры обновляют индекс при изменении и удалении поста."""
+        self.often.text = "Теперь про попугая"
+        self.often.save()
+        self.assertEqual(self.search("кот"), [self.once.pk])
+        self.assertEqual(self.search("попугая"), [self.often.pk])
+        self.once.delete()
+        self.assertEqual(self.search("кот"), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Синтаксис FTS5 из запроса не ломает поиск."""
+        self.assertEqual(
+            match_expression('кот" OR NEAR(*'), '"кот"* "OR"* "NEAR"*'
+        )
+        self.assertEqual(self.search('"кот'), [self.often.pk, self.once.pk])
+        self.assertEqual(self.search("!!!"), [])
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты."""
+        response = self.client.get(reverse("posts:search"), {"q": "собаку"})
+        self.assertTemplateUsed(response, "posts/search.html")
+        self.assertEqual(response.context["page_obj"].paginator.count, 2)
+        self.assertNotIn(self.often, response.context["page_obj"])
+
+    def test_admin_search(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        self.client.force_login(self.superuser)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "кот"}
+        )
+        self.assertEqual(
+            set(response.context["cl"].result_list),
+            {self.often, self.once},
+        )
+
+    def test_rebuild_command(self):
+        """Команда перестраивает индекс по всем постам."""
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("3", out.getvalue())
+        self.assertEqual(self.search("кот"), [self.often.pk, self.once.pk])
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import install, log_slow_query, query_shape
+from posts.models import Post, User
+
+TEMP_LOG_DIR = tempfile.mkdtemp()
+TEMP_LOG_FILE = os.path.join(TEMP_LOG_DIR, "slow.log")
+
+
+@override_settings(
+    SLOW_QUERY_LOG=True,
+    SLOW_QUERY_THRESHOLD_MS=0,
+    SLOW_QUERY_LOG_FILE=TEMP_LOG_FILE,
+)
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="slow")
+        Post.objects.create(author=cls.user, text="Пост")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_LOG_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        if os.path.exists(TEMP_LOG_FILE):
+            open(TEMP_LOG_FILE, "w").close()
+        install(None, connection)
+        self.addCleanup(connection.execute_wrappers.remove, log_slow_query)
+
+    def records(self):
+        with open(TEMP_LOG_FILE, encoding="utf-8") as log:
+            return [json.loads(line) for line in log]
+
+    def test_record_has_plan_view_and_caller(self):
+        """В журнал попадают SQL, параметры, view, место вызова и план"""
+        Client().get(reverse("posts:index"))
+        record = next(
+            record for record in self.records()
+            if '"posts_post"' in record["sql"] and record["plan"]
+        )
+        self.assertEqual(record["view"], "posts:index")
+        self.assertIsNotNone(record["caller"])
+        self.assertIsInstance(record["params"], list)
+        self.assertNotIn(
+            "EXPLAIN", " ".join(record["sql"] for record in self.records())
+        )
+
+    def test_command_groups_by_shape(self):
+        """Команда сводит запросы одного вида вместе"""
+        for pk in (1, 2, 3):
+            list(Post.objects.filter(pk__in=[pk] * pk))
+        out = StringIO()
+        call_command("slow_queries", file=TEMP_LOG_FILE, stdout=out)
+        self.assertIn("3 раз", out.getvalue())
+        self.assertIn("IN (...)", out.getvalue())
+
+    def test_query_shape(self):
+        """Литералы и списки параметров не различают виды запросов"""
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE a = 'x'  AND b IN (%s, %s)"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...)",
+        )
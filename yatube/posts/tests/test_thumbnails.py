@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import SITE_SCOPE, get_generations
+from posts.models import Post, User
+from posts.thumbnails import (SORL_PRIVATE_API, attach_thumbnails,
+                              feed_thumbnail, generate_thumbnail,
+                              thumbnail_file)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        cache.clear()
+        self.user = User.objects.create_user(username="thumbs")
+
+    def create_post(self, name="small.gif"):
+        return Post.objects.create(
+            author=self.user,
+            text="Пост с картинкой",
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+
+    def thumbnails(self):
+        found = []
+        for root, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, "cache")):
+            found.extend(files)
+        return found
+
+    def test_generate_thumbnail(self):
+        """Миниатюра поста создаётся вне шаблона"""
+        post = self.create_post()
+        self.assertEqual(self.thumbnails(), [])
+        generate_thumbnail(post.id)
+        self.assertEqual(len(self.thumbnails()), 1)
+
+    def test_warm_thumbnails_command(self):
+        """warm_thumbnails создаёт миниатюры для всех картинок"""
+        self.create_post("first.gif")
+        self.create_post("second.gif")
+        Post.objects.create(author=self.user, text="Без картинки")
+        call_command(
+            "warm_thumbnails", processes=1, chunk_size=1, stdout=StringIO()
+        )
+        self.assertEqual(len(self.thumbnails()), 2)
+        self.assertFalse(
+            Post.objects.exclude(image="").filter(thumbnail="").exists()
+        )
+
+    def test_warm_thumbnails_is_incremental(self):
+        """Повторный запуск не трогает готовые миниатюры"""
+        self.create_post("first.gif")
+        site, = get_generations(SITE_SCOPE)
+        call_command("warm_thumbnails", processes=1, stdout=StringIO())
+        self.assertGreater(get_generations(SITE_SCOPE)[0], site)
+        versions = list(Post.objects.values_list("version", flat=True))
+        output = StringIO()
+        call_command("warm_thumbnails", processes=1, stdout=output)
+        self.assertIn("Миниатюр: 0", output.getvalue())
+        self.assertEqual(
+            list(Post.objects.values_list("version", flat=True)), versions
+        )
+
+    def test_thumbnail_stored_by_post_id(self):
+        """Миниатюра записывается в пост по id, а не по имени картинки"""
+        post = self.create_post()
+        other = Post.objects.create(
+            author=self.user, text="Та же картинка", image=post.image.name
+        )
+        with CaptureQueriesContext(connection) as queries:
+            generate_thumbnail(post.id)
+        updates = [
+            query["sql"] for query in queries
+            if query["sql"].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('WHERE "posts_post"."id" =', updates[0])
+        other.refresh_from_db()
+        self.assertEqual(other.thumbnail, "")
+
+    def test_sorl_private_api(self):
+        """Закрытые методы sorl на месте и дают то же имя миниатюры"""
+        from sorl.thumbnail import default
+
+        for name in SORL_PRIVATE_API:
+            with self.subTest(name=name):
+                self.assertTrue(
+                    hasattr(default.backend, name),
+                    f"В sorl-thumbnail больше нет {name}: проверьте "
+                    "thumbnail_file после обновления sorl",
+                )
+        post = self.create_post()
+        self.assertEqual(
+            thumbnail_file(post.image).name, feed_thumbnail(post.image).name
+        )
+
+    def test_without_sorl_private_api(self):
+        """Без закрытых методов sorl миниатюры уходят в пул"""
+        post = self.create_post()
+        with mock.patch(
+            "posts.thumbnails.has_sorl_private_api", return_value=False
+        ), mock.patch(
+            "posts.thumbnails.schedule_thumbnail"
+        ) as schedule, self.assertLogs("posts.thumbnails", "ERROR"):
+            attach_thumbnails([post])
+        self.assertIsNone(post.thumb)
+        schedule.assert_called_once_with(post)
+
+    def test_page_thumbnails_in_one_lookup(self):
+        """Миниатюры страницы находятся одним запросом"""
+        posts = [self.create_post(f"{i}.gif") for i in range(3)]
+        posts.append(Post.objects.create(author=self.user, text="Текст"))
+        for post in posts:
+            generate_thumbnail(post.id)
+        cache.clear()
+        with self.assertNumQueries(1):
+            attach_thumbnails(posts)
+        with self.assertNumQueries(0):
+            attach_thumbnails(posts)
+        for post in posts[:3]:
+            with self.subTest(post=post.id):
+                self.assertEqual(
+                    post.thumb.url, feed_thumbnail(post.image).url
+                )
+                self.assertEqual(post.thumb.size, [960, 339])
+        self.assertIsNone(posts[3].thumb)
+
+    def test_feed_shows_thumbnail(self):
+        """Лента не создаёт миниатюру в запросе, а отдаёт её пулу"""
+        post = self.create_post()
+        with mock.patch("posts.thumbnails.schedule_thumbnail") as schedule:
+            response = self.client.get(reverse("posts:index"))
+        self.assertNotContains(response, "card-img")
+        self.assertEqual(self.thumbnails(), [])
+        schedule.assert_called_once_with(post)
+        generate_thumbnail(post.id)
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, feed_thumbnail(post.image).url)
+
+    def test_image_fields_are_stored(self):
+        """Размеры картинки и миниатюра сохраняются в посте"""
+        post = self.create_post()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.thumbnail, "")
+        generate_thumbnail(post.id)
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, feed_thumbnail(post.image).name)
+        self.assertEqual((post.thumbnail_width, post.thumbnail_height),
+                         (960, 339))
+        cache.clear()
+        with self.assertNumQueries(0):
+            attach_thumbnails([post])
+        self.assertEqual(post.thumb.url, feed_thumbnail(post.image).url)
+
+    def test_backfill_command(self):
+        """backfill_post_images заполняет поля старых постов"""
+        post = self.create_post()
+        Post.objects.update(image_width=None, image_height=None)
+        site, = get_generations(SITE_SCOPE)
+        call_command("backfill_post_images", stdout=StringIO())
+        self.assertGreater(get_generations(SITE_SCOPE)[0], site)
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual((post.thumbnail_width, post.thumbnail_height),
+                         (960, 339))
@@ -1,11 +1,17 @@
+import base64
+
 from django import forms
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from posts.models import Post, Group, User
+from posts.models import Comment, Post, Group, User
 from yatube.settings import COUNT
 from posts.forms import PostForm
+from posts.utils import FeedPaginator, decode_cursor, pagenator
 
 
 class PostPagesTests(TestCase):
@@ -244,3 +250,225 @@ class PaginatorViewsTest(TestCase):
             self.assertEqual(count_posts2,
                              SUM_PAGE - FIRST_PAGE_AMOUNT,
                              error_name2)
+
+
+class FeedQueryBudgetTest(TestCase):
+    QUERY_BUDGET = {
+        "index": 2,
+        "group": 2,
+        "profile": 2,
+        "detail": 2,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="budget")
+        cls.group = Group.objects.create(
+            title="Группа",
+            slug="budget",
+            description="Описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text="Первый пост",
+            group=cls.group,
+        )
+        cls.urls = {
+            "index": reverse("posts:index"),
+            "group": reverse(
+                "posts:group_progect", kwargs={"slug": cls.group.slug}
+            ),
+            "profile": reverse(
+                "posts:profile", kwargs={"username": cls.user.username}
+            ),
+            "detail": reverse(
+                "posts:post_detail", kwargs={"post_id": cls.post.id}
+            ),
+        }
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_pages_fit_query_budget(self):
+        """Число запросов страницы не превышает бюджет"""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertLessEqual(
+                    self.count_queries(url), self.QUERY_BUDGET[name]
+                )
+
+    def test_query_count_does_not_grow_with_page(self):
+        """Число запросов не зависит от количества постов на странице"""
+        before = {
+            name: self.count_queries(url) for name, url in self.urls.items()
+        }
+        for i in range(COUNT * 2):
+            author = User.objects.create_user(username=f"author{i}")
+            group = Group.objects.create(
+                title=f"Группа {i}",
+                slug=f"budget-{i}",
+                description="Описание",
+            )
+            Post.objects.create(author=author, text=f"Пост {i}", group=group)
+            Post.objects.create(
+                author=self.user, text=f"Пост {i}", group=self.group
+            )
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertEqual(self.count_queries(url), before[name])
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="cursor")
+        Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=cls.user)
+            for i in range(COUNT + 5)
+        )
+        cls.factory = RequestFactory()
+
+    def get_page(self, **params):
+        request = self.factory.get("/", params)
+        with CaptureQueriesContext(connection) as queries:
+            page_obj = pagenator(request, Post.objects.feed(), cursor=True)
+            posts = list(page_obj)
+        for query in queries:
+            self.assertNotIn("COUNT(", query["sql"])
+            self.assertNotIn("OFFSET", query["sql"])
+        return page_obj, posts
+
+    def test_cursor_navigation(self):
+        """Курсорная пагинация листает вперёд и назад без COUNT/OFFSET"""
+        first, first_posts = self.get_page()
+        self.assertEqual(len(first_posts), COUNT)
+        self.assertTrue(first.has_next())
+        self.assertFalse(first.has_previous())
+        second, second_posts = self.get_page(after=first.next_cursor)
+        self.assertEqual(len(second_posts), 5)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        self.assertFalse(set(first_posts) & set(second_posts))
+        back, back_posts = self.get_page(before=second.previous_cursor)
+        self.assertEqual(back_posts, first_posts)
+        self.assertFalse(back.has_previous())
+
+    def test_cursor_view(self):
+        """Страница с курсором в запросе отображается"""
+        first, _ = self.get_page()
+        response = self.client.get(
+            reverse("posts:index"), {"after": first.next_cursor}
+        )
+        self.assertEqual(len(response.context["page_obj"]), 5)
+        self.assertContains(response, "?before=")
+
+    def test_broken_cursor(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.client.get(reverse("posts:index"), {"after": "%%"})
+        self.assertEqual(len(response.context["page_obj"]), COUNT)
+
+    def test_huge_cursor_pk(self):
+        """Курсор с ключом вне 64-битного диапазона не ломает ленту"""
+        pub_date = Post.objects.first().pub_date.isoformat()
+        for pk in (2 ** 63, -2 ** 63 - 1, 10 ** 30):
+            cursor = base64.urlsafe_b64encode(
+                f"{pub_date}|{pk}".encode()
+            ).decode()
+            with self.subTest(pk=pk):
+                self.assertIsNone(decode_cursor(cursor))
+                response = self.client.get(
+                    reverse("posts:index"), {"after": cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+
+
+class ElidedPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="elided")
+        cls.group = Group.objects.create(
+            title="Большая группа",
+            slug="big",
+            description="Описание",
+        )
+        Post.objects.create(author=cls.user, text="Текст", group=cls.group)
+        Group.objects.filter(pk=cls.group.pk).update(posts_count=COUNT * 10000)
+
+    def test_page_links_are_bounded(self):
+        """Число ссылок пагинатора не зависит от числа страниц"""
+        url = reverse("posts:group_progect", kwargs={"slug": self.group.slug})
+        for page in (1, 5000, 10000):
+            with self.subTest(page=page):
+                response = self.client.get(url, {"page": page})
+                page_obj = response.context["page_obj"]
+                self.assertEqual(page_obj.number, page)
+                self.assertLessEqual(
+                    response.content.decode().count('class="page-item'), 15
+                )
+                self.assertContains(response, ">10000<")
+
+    def test_elided_page_range(self):
+        """Окно номеров страниц вокруг текущей"""
+        paginator = FeedPaginator([], COUNT, count=COUNT * 100)
+        self.assertEqual(
+            paginator.get_elided_page_range(50),
+            [1, paginator.ELLIPSIS, 48, 49, 50, 51, 52,
+             paginator.ELLIPSIS, 100],
+        )
+        self.assertEqual(
+            paginator.get_elided_page_range(1),
+            [1, 2, 3, paginator.ELLIPSIS, 100],
+        )
+
+
+class PostCommentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="commenter")
+        cls.post = Post.objects.create(author=cls.user, text="Пост")
+        for i in range(COUNT + 5):
+            author = User.objects.create_user(username=f"commenter{i}")
+            Comment.objects.create(
+                post=cls.post, author=author, text=f"Комментарий {i}"
+            )
+        cls.url = reverse("posts:post_detail", kwargs={"post_id": cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comments_are_paginated(self):
+        """Комментарии выводятся страницами, новые первыми"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), COUNT)
+        self.assertEqual(comments[0].text, f"Комментарий {COUNT + 4}")
+        response = self.client.get(self.url, {"page": 2})
+        self.assertEqual(len(response.context["comments"]), 5)
+
+    def test_add_comment_updates_count(self):
+        """add_comment увеличивает счётчик, видный в ленте"""
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, COUNT + 5)
+        self.client.get(reverse("posts:index"))
+        self.authorized_client.post(
+            reverse("posts:add_comment", kwargs={"post_id": self.post.id}),
+            {"text": "Новый комментарий"},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, COUNT + 6)
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, f"Комментариев: {COUNT + 6}")
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr, truncatechars
+
+
+def render_text(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def text_fields(text, preview_length=None):
+    """HTML поста и короткая версия для карточек ленты."""
+    if preview_length is None:
+        preview_length = settings.POST_PREVIEW_LENGTH
+    html = render_text(text)
+    if len(text) <= preview_length:
+        # Обрезать нечего, а truncatechars нормализует весь текст
+        return html, html
+    return html, render_text(truncatechars(text, preview_length))
+
+
+def fill_text_fields(post):
+    post.text_html, post.preview_html = text_fields(post.text)
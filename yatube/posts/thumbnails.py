@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from core.metrics import THUMBNAIL_LATENCY
+
+from .cache import bump_generations, post_scopes
+
+FEED_GEOMETRY = "960x339"
+FEED_OPTIONS = {"crop": "center", "upscale": True}
+# Закрытые методы бэкенда sorl (версия закреплена в requirements.txt),
+# по которым имя миниатюры строится без обращения к хранилищу
+SORL_PRIVATE_API = ("_get_format", "_get_thumbnail_filename")
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Посты, миниатюры которых уже ждут в пуле
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def feed_thumbnail(image):
+    return get_thumbnail(image, FEED_GEOMETRY, **FEED_OPTIONS)
+
+
+def has_sorl_private_api():
+    return all(hasattr(default.backend, name) for name in SORL_PRIVATE_API)
+
+
+def thumbnail_options(source):
+    # Те же опции, что достраивает sorl в ThumbnailBackend.get_thumbnail,
+    # иначе имя файла миниатюры не совпадёт
+    backend = default.backend
+    options = dict(FEED_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault("format", backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image):
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, FEED_GEOMETRY, thumbnail_options(source)
+    )
+    return ImageFile(name, default.storage)
+
+
+def lookup_thumbnails(thumbnails):
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        return {
+            thumbnail.key: kvstore.get(thumbnail) for thumbnail in thumbnails
+        }
+    keys = {add_prefix(thumbnail.key): thumbnail for thumbnail in thumbnails}
+    values = {
+        key: value
+        for key, value in kvstore.cache.get_many(list(keys)).items()
+        if isinstance(value, str)
+    }
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStore.objects.filter(key__in=missing).values_list("key", "value")
+        )
+        kvstore.cache.set_many(stored, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(stored)
+    return {
+        keys[key].key: deserialize_image_file(value)
+        for key, value in values.items()
+    }
+
+
+def stored_thumbnail(post):
+    if not post.thumbnail:
+        return None
+    thumb = ImageFile(post.thumbnail, default.storage)
+    thumb.set_size((post.thumbnail_width, post.thumbnail_height))
+    return thumb
+
+
+def store_thumbnail(post_id, thumb):
+    from .models import Post
+
+    if not thumb.size:
+        return
+    # Поколения лент сбрасывает вызывающий: для одного поста
+    # или разом после всей команды
+    # По первичному ключу: на поле image индекса нет
+    Post.objects.filter(pk=post_id).update(
+        thumbnail=thumb.name,
+        thumbnail_width=thumb.width,
+        thumbnail_height=thumb.height,
+        version=F("version") + 1,
+    )
+
+
+def attach_thumbnails(posts):
+    """Находит миниатюры всех постов страницы одним запросом к кешу
+    и не больше чем одним запросом к базе.
+
+    Недостающие миниатюры создаёт фоновый пул, а карточка пока
+    выводится без картинки.
+    """
+    posts = list(posts)
+    thumbnails = {}
+    lookup = has_sorl_private_api()
+    if not lookup:
+        logger.error(
+            "В sorl нет %s: миниатюры ищутся только в постах",
+            ", ".join(SORL_PRIVATE_API),
+        )
+    for post in posts:
+        post.thumb = stored_thumbnail(post)
+        if not post.image or post.thumb is not None:
+            continue
+        if lookup:
+            thumbnails[post.pk] = thumbnail_file(post.image)
+        else:
+            schedule_thumbnail(post)
+    found = lookup_thumbnails(thumbnails.values())
+    for post in posts:
+        if post.pk not in thumbnails:
+            continue
+        thumb = found.get(thumbnails[post.pk].key)
+        if thumb is None:
+            schedule_thumbnail(post)
+        elif thumb.size:
+            post.thumb = thumb
+    return posts
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+        return _executor
+
+
+def timed_thumbnail(image):
+    started = time.perf_counter()
+    result = "error"
+    try:
+        thumb = feed_thumbnail(image)
+        result = "ok"
+        return thumb
+    finally:
+        THUMBNAIL_LATENCY.observe(time.perf_counter() - started, result)
+
+
+def generate_thumbnail(post_id):
+    from .models import Post
+
+    try:
+        row = (
+            Post.objects.filter(pk=post_id)
+            .values_list("image", "author_id", "group_id")
+            .first()
+        )
+        if row and row[0]:
+            image, author_id, group_id = row
+            store_thumbnail(post_id, timed_thumbnail(image))
+            # Ленты, отрисованные без картинки, устарели
+            bump_generations(post_scopes(author_id, (group_id,), post_id))
+    except Exception:
+        logger.exception("Не удалось создать миниатюру поста %s", post_id)
+    finally:
+        with _pending_lock:
+            _pending.discard(post_id)
+        # У потока пула своё соединение с базой, не держим его открытым
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def submit_thumbnail(post_id):
+    with _pending_lock:
+        if post_id in _pending:
+            return
+        _pending.add(post_id)
+    get_executor().submit(generate_thumbnail, post_id)
+
+
+def schedule_thumbnail(post):
+    if not settings.THUMBNAIL_WORKERS:
+        return
+    post_id = post.pk
+    transaction.on_commit(lambda: submit_thumbnail(post_id))
+
+
+def warm_thumbnail(item):
+    """item — пара (id поста, имя картинки)."""
+    post_id, name = item
+    try:
+        store_thumbnail(post_id, timed_thumbnail(name))
+    except Exception:
+        logger.exception("Не удалось создать миниатюру %s", name)
+        return False
+    return True
@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import AuthorCounter, Follow, Post, TimelineEntry
+from .utils import CURSOR_FIELDS
+
+TIMELINE_CURSOR = ("entry_date", "entry_post")
+
+
+def is_popular(author_id):
+    """Посты популярных авторов не раскладываются по лентам,
+    а подмешиваются при чтении."""
+    return AuthorCounter.objects.filter(
+        author_id=author_id,
+        followers_count__gt=settings.FOLLOW_FANOUT_LIMIT,
+    ).exists()
+
+
+def add_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user", flat=True
+    )
+    add_entries(
+        TimelineEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def fan_out_posts(posts):
+    """fan_out для пачки постов: подписчики каждого автора читаются
+    одним запросом на всю пачку."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    popular = AuthorCounter.objects.filter(
+        author_id__in=by_author,
+        followers_count__gt=settings.FOLLOW_FANOUT_LIMIT,
+    ).values_list("author_id", flat=True)
+    followers = Follow.objects.filter(
+        author_id__in=by_author.keys() - set(popular)
+    ).values_list("author_id", "user_id")
+    add_entries(
+        TimelineEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for author_id, user_id in followers.iterator()
+        for post in by_author[author_id]
+    )
+
+
+def backfill(user_id, author_id):
+    if is_popular(author_id):
+        return
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by("-pub_date", "-id")
+        .values_list("pk", "pub_date")[:settings.TIMELINE_BACKFILL]
+    )
+    add_entries(
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def timeline(user):
+    """Лента подписок для MergedCursorPaginator: пары (выборка, поля
+    курсора).
+
+    Записи ленты листаются по индексу (user, pub_date, post), посты
+    каждого популярного автора — по индексу (author, pub_date, id).
+    """
+    entries = Post.objects.feed().filter(timeline_entries__user=user)
+    # Аннотации используют тот же JOIN, что и фильтр по пользователю:
+    # отдельный filter() по записям ленты добавил бы ещё один
+    entries = entries.annotate(
+        entry_date=F("timeline_entries__pub_date"),
+        entry_post=F("timeline_entries__post"),
+    )
+    popular = Follow.objects.filter(
+        user=user,
+        author__post_counter__followers_count__gt=(
+            settings.FOLLOW_FANOUT_LIMIT
+        ),
+    ).values_list("author", flat=True)
+    return [(entries, TIMELINE_CURSOR)] + [
+        (Post.objects.feed().filter(author_id=author_id), CURSOR_FIELDS)
+        for author_id in popular
+    ]
@@ -9,6 +9,19 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("profile/<str:username>/", views.profile, name="profile"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
+    path("search/", views.search, name="search"),
+    path("export/", views.export, name="export"),
+    path("follow/", views.follow_index, name="follow_index"),
+    path(
+        "profile/<str:username>/follow/",
+        views.profile_follow,
+        name="profile_follow",
+    ),
+    path(
+        "profile/<str:username>/unfollow/",
+        views.profile_unfollow,
+        name="profile_unfollow",
+    ),
     path("create/", views.post_create, name="post_create"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="post_edit"),
     path(
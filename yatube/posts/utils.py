@@ -1,9 +1,214 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import heapq
+
+from django.core.paginator import Page, Paginator
 from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Поля ключа курсора: дата и id поста
+CURSOR_FIELDS = ("pub_date", "id")
+# Первичные ключи — знаковые 64-битные целые (INTEGER в SQLite)
+MAX_PK = 2 ** 63 - 1
+
+
+def encode_cursor(post):
+    value = f"{post.pub_date.isoformat()}|{post.pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def cursor_key(post):
+    return post.pub_date, post.pk
+
+
+def decode_cursor(token):
+    try:
+        value = base64.urlsafe_b64decode(token.encode()).decode()
+        pub_date, pk = value.split("|")
+        pub_date, pk = parse_datetime(pub_date), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if pub_date is None or not -MAX_PK - 1 <= pk <= MAX_PK:
+        return None
+    return pub_date, pk
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    fields — поля выборки с датой и id поста, если ключ берётся
+    не из самого поста (например, из записи ленты подписок).
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, fields=CURSOR_FIELDS):
+        self.date_field, self.key_field = fields
+        self.object_list = object_list.order_by(
+            f"-{self.date_field}", f"-{self.key_field}"
+        )
+        self.per_page = int(per_page)
+
+    def seek(self, cursor, op):
+        pub_date, pk = cursor
+        date, key = self.date_field, self.key_field
+        return self.object_list.filter(**{f"{date}__{op}e": pub_date}).filter(
+            Q(**{f"{date}__{op}": pub_date})
+            | Q(**{date: pub_date, f"{key}__{op}": pk})
+        )
+
+    def seek_after(self, cursor):
+        return self.seek(cursor, "lt")
+
+    def seek_before(self, cursor):
+        return self.seek(cursor, "gt").reverse()
+
+    def fetch(self, after=None, before=None):
+        """Не больше per_page + 1 постов: после after по убыванию
+        или перед before по возрастанию ключа."""
+        if before is not None:
+            posts = self.seek_before(before)
+        elif after is not None:
+            posts = self.seek_after(after)
+        else:
+            posts = self.object_list
+        return list(posts[:self.per_page + 1])
+
+    def get_page(self, after=None, before=None):
+        posts = self.fetch(after=after, before=before)
+        if before is not None:
+            has_previous = len(posts) > self.per_page
+            posts = posts[:self.per_page][::-1]
+            return CursorPage(posts, self, True, has_previous)
+        has_next = len(posts) > self.per_page
+        return CursorPage(
+            posts[:self.per_page], self, has_next, after is not None
+        )
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Курсорный вывод нескольких выборок как одной ленты.
+
+    object_lists — пары (выборка, поля курсора). Каждая выборка
+    читается одним диапазоном своего индекса с LIMIT per_page + 1,
+    слияние и удаление повторов — в Python.
+    """
+
+    def __init__(self, object_lists, per_page):
+        self.parts = [
+            CursorPaginator(object_list, per_page, fields)
+            for object_list, fields in object_lists
+        ]
+        self.per_page = int(per_page)
+
+    def fetch(self, after=None, before=None):
+        merged = heapq.merge(
+            *(part.fetch(after=after, before=before) for part in self.parts),
+            key=cursor_key,
+            reverse=before is None,
+        )
+        posts, seen = [], set()
+        for post in merged:
+            if post.pk not in seen:
+                seen.add(post.pk)
+                posts.append(post)
+        return posts[:self.per_page + 1]
+
+
+class FeedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class FeedPaginator(Paginator):
+    """Paginator, которому можно передать заранее известное число постов.
+
+    Вместо всего page_range шаблону отдаётся окно номеров вокруг
+    текущей страницы, первая и последняя страницы и многоточия.
+    """
+
+    ELLIPSIS = "…"
+
+    def __init__(self, object_list, per_page, count=None, on_each_side=2,
+                 on_ends=1, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+        self.on_each_side = on_each_side
+        self.on_ends = on_ends
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1):
+        number = self.validate_number(number)
+        on_each_side, on_ends = self.on_each_side, self.on_ends
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        pages = []
+        if number > on_each_side + on_ends + 2:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(number - on_each_side, number))
+        else:
+            pages.extend(range(1, number))
+        pages.append(number)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            pages.extend(range(number + 1, number + on_each_side + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(
+                range(self.num_pages - on_ends + 1, self.num_pages + 1)
+            )
+        else:
+            pages.extend(range(number + 1, self.num_pages + 1))
+        return pages
+
 
+def pagenator(request, post_list, cursor=None, count=None):
+    """cursor=None включает курсорный режим по ?after=/?before=,
+    True — всегда, False — никогда (для выборок без pub_date).
 
-def pagenator(request, post_list):
-    paginator = Paginator(post_list, settings.COUNT)
+    post_list может быть списком пар (выборка, поля курсора) —
+    выборки сливаются в одну ленту, только курсорно.
+    """
+    after = before = None
+    if cursor is not False:
+        after = decode_cursor(request.GET.get("after", ""))
+        before = decode_cursor(request.GET.get("before", ""))
+    if cursor or after or before:
+        if isinstance(post_list, list):
+            paginator = MergedCursorPaginator(post_list, settings.COUNT)
+        else:
+            paginator = CursorPaginator(post_list, settings.COUNT)
+        return paginator.get_page(after=after, before=before)
+    paginator = FeedPaginator(post_list, settings.COUNT, count=count)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     return page_obj
@@ -1,13 +1,47 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.http import urlencode
 
-from .models import Post, Group, User
+from .models import Follow, Post, Group, User
+from .cache import (cache_anonymous_page, conditional_feed, feed_scope,
+                    get_lookup, set_lookup)
+from .counters import author_posts_count
+from .export import (CONTENT_TYPES, export_rows, parse_bound, render_rows,
+                     select_posts)
 from .forms import CommentForm, PostForm
+from .search import SearchResults
+from .timeline import timeline
 from .utils import pagenator
 
 
+def index_scopes():
+    return (feed_scope("index"),)
+
+
+def group_scopes(slug):
+    pk = get_lookup("group", slug)
+    return None if pk is None else (feed_scope("group", pk),)
+
+
+def profile_scopes(username):
+    pk = get_lookup("user", username)
+    return None if pk is None else (feed_scope("author", pk),)
+
+
+def detail_scopes(post_id):
+    # Автор нужен ради счётчика его постов на странице
+    author_id = get_lookup("post_author", post_id)
+    if author_id is None:
+        return None
+    return feed_scope("post", post_id), feed_scope("author", author_id)
+
+
+@conditional_feed(index_scopes)
+@cache_anonymous_page
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.feed()
     page_obj = pagenator(request, post_list)
     context = {
         "page_obj": page_obj,
@@ -15,10 +49,13 @@ def index(request):
     return render(request, "posts/index.html", context)
 
 
+@conditional_feed(group_scopes)
+@cache_anonymous_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    page_obj = pagenator(request, posts)
+    set_lookup("group", slug, group.pk)
+    posts = group.posts.feed()
+    page_obj = pagenator(request, posts, count=group.posts_count)
     context = {
         "page_obj": page_obj,
         "group": group,
@@ -26,28 +63,53 @@ def group_posts(request, slug):
     return render(request, "posts/group_list.html", context)
 
 
+@conditional_feed(profile_scopes)
+@cache_anonymous_page
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    page_obj = pagenator(request, post_list=posts)
+    author = get_object_or_404(
+        User.objects.select_related("post_counter"), username=username
+    )
+    set_lookup("user", username, author.pk)
+    posts = author.posts.feed()
+    page_obj = pagenator(
+        request, post_list=posts, count=author_posts_count(author)
+    )
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
     context = {
         "author": author,
         "page_obj": page_obj,
+        "following": following,
     }
     return render(request, "posts/profile.html", context)
 
 
+@conditional_feed(detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related("author__post_counter", "group"),
+        id=post_id,
+    )
+    set_lookup("post_author", post_id, post.author_id)
+    comments = pagenator(
+        request,
+        post.comments.select_related("author"),
+        cursor=False,
+        count=post.comment_count,
+    )
     context = {
         "post": post,
+        "comments": comments,
+        "form": CommentForm(),
     }
     return render(request, "posts/post_detail.html", context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -66,7 +128,8 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        post.save(update_fields=post.edit_fields(PostForm.Meta.fields))
         return redirect("posts:post_detail", post_id)
     context = {
         "form": form,
@@ -85,3 +148,64 @@ def add_comment(request, post_id):
         comment.post = post
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    page_obj = pagenator(request, SearchResults(query), cursor=False)
+    context = {
+        "page_obj": page_obj,
+        "query": query,
+        "page_query": urlencode({"q": query}) + "&",
+    }
+    return render(request, "posts/search.html", context)
+
+
+@login_required
+def follow_index(request):
+    page_obj = pagenator(request, timeline(request.user), cursor=True)
+    context = {
+        "page_obj": page_obj,
+    }
+    return render(request, "posts/follow.html", context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect("posts:profile", username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        # Удаляем через экземпляр, чтобы сработал сигнал и лента
+        # очистилась от постов автора
+        follow.delete()
+    return redirect("posts:profile", username=username)
+
+
+@staff_member_required
+def export(request):
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in CONTENT_TYPES:
+        return HttpResponseBadRequest("Неизвестный формат")
+    try:
+        posts = select_posts(
+            parse_bound(request.GET.get("since")),
+            parse_bound(request.GET.get("until"), end=True),
+            request.GET.get("group"),
+            request.GET.get("author"),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        render_rows(export_rows(posts), fmt),
+        content_type=CONTENT_TYPES[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="posts.{fmt}"'
+    return response
@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -20,9 +21,31 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 USE_TZ = True
 COUNT = 10
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+ANONYMOUS_CACHE_TIMEOUT = 60 * 60
+ADMIN_COUNT_TIMEOUT = 60
+POST_PREVIEW_LENGTH = 300
+# Server-Timing и строка лога с метриками каждого запроса
+SERVER_TIMING = os.getenv('SERVER_TIMING', '') == '1'
+# Гистограммы для /metrics
+METRICS_ENABLED = True
+# Кому без входа в админку открыт /metrics (адреса через запятую)
+METRICS_ALLOWED_IPS = os.getenv(
+    'METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+).split(',')
+# Журнал медленных запросов с EXPLAIN
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', '') == '1'
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_FILE = os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+FOLLOW_FANOUT_LIMIT = 1000
+TIMELINE_BATCH_SIZE = 500
+TIMELINE_BACKFILL = 100
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+THUMBNAIL_WORKERS = 2
 
 INSTALLED_APPS = [
     'posts.apps.PostsConfig',
@@ -39,6 +62,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +76,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
@@ -71,6 +112,29 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Поколения лент, карточки и страницы должны быть общими для всех
+# процессов сервера: LocMemCache у каждого воркера свой, и сброс в одном
+# не виден остальным. При нескольких воркерах задайте общий кеш, например
+# CACHE_LOCATION=127.0.0.1:11211 (memcached, адреса через запятую) и при
+# необходимости CACHE_BACKEND. Тесты всегда работают с LocMemCache.
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+if CACHE_LOCATION and sys.argv[1:2] != ['test']:
+    CACHES = {
+        'default': {
+            'BACKEND': os.getenv(
+                'CACHE_BACKEND',
+                'django.core.cache.backends.memcached.MemcachedCache',
+            ),
+            'LOCATION': CACHE_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -3,6 +3,7 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import metrics
 
 urlpatterns = [
     path("", include("posts.urls", namespace="posts")),
@@ -10,6 +11,7 @@ urlpatterns = [
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path("about/", include("about.urls", namespace="about")),
+    path("metrics", metrics, name="metrics"),
 ]
 
 if settings.DEBUG: